@@ -0,0 +1,171 @@
+"""
+Micro-benchmarks of the hot paths of europi.py and mcp4728.py.
+
+Each operation is called repeatedly for about BENCHMARK_MS milliseconds, and the number of calls per
+second, the time per call and the memory allocated per call are reported. The calls are timed with
+the garbage collector enabled, so the time includes the collections. The allocations are measured
+separately, from the ``gc.mem_free()`` delta of ALLOCATION_CALLS calls with the garbage collector
+disabled.
+
+On the module, run it from the REPL or with ``mpremote run benchmark.py``: the results are printed
+and saved as JSON in ``benchmark-<version>.json``.
+
+On a computer, it runs in the simulator from this directory::
+
+    python benchmark.py [output.json]
+    python benchmark.py --compare before.json after.json
+
+The host numbers include the cost of the simulated peripherals, which are written in Python, so they
+can only be compared with other host numbers.
+"""
+import gc
+import json
+import sys
+
+if sys.implementation.name != "micropython":
+    import simulator
+
+    simulator.install()
+    import tracemalloc
+
+    tracemalloc.start()
+
+from utime import ticks_add, ticks_diff, ticks_ms, ticks_us
+
+import europi
+from europi import ain, cv1, cv3, k1, oled
+from version import __version__
+
+BENCHMARK_MS = 1000
+ALLOCATION_CALLS = 100
+
+
+def _loop_overhead_us(iterations):
+    """Return the time taken by a loop calling an empty function, in microseconds."""
+
+    def noop():
+        pass
+
+    start = ticks_us()
+    for _ in range(iterations):
+        noop()
+    return ticks_diff(ticks_us(), start)
+
+
+def measure(func, duration_ms=BENCHMARK_MS):
+    """Call ``func`` repeatedly for about ``duration_ms`` and return a dict with the results."""
+    func()  # warm up: caches, tables, first allocations
+    batch = 1
+    iterations = 0
+    elapsed_us = 0
+    gc.collect()
+    deadline = ticks_add(ticks_ms(), duration_ms)
+    while ticks_diff(deadline, ticks_ms()) > 0:
+        start = ticks_us()
+        for _ in range(batch):
+            func()
+        elapsed_us += ticks_diff(ticks_us(), start)
+        iterations += batch
+        if batch < 64:
+            batch *= 2
+    elapsed_us = max(elapsed_us - _loop_overhead_us(iterations), 1)
+    return {
+        "iterations": iterations,
+        "calls_per_second": round(iterations * 1_000_000 / elapsed_us, 1),
+        "us_per_call": round(elapsed_us / iterations, 2),
+        "bytes_per_call": round(_allocated(func) / ALLOCATION_CALLS, 1),
+    }
+
+
+def _allocated(func, calls=ALLOCATION_CALLS):
+    """Return the bytes allocated by ``calls`` calls of ``func``, without garbage collection."""
+    gc.collect()
+    gc.disable()
+    try:
+        mem_before = gc.mem_free()
+        for _ in range(calls):
+            func()
+        allocated = mem_before - gc.mem_free()
+    finally:
+        gc.enable()
+    return max(allocated, 0)
+
+
+def _alternate(*funcs):
+    """Return a function calling each of ``funcs`` in turn."""
+    state = [0]
+
+    def call():
+        funcs[state[0]]()
+        state[0] = (state[0] + 1) % len(funcs)
+
+    return call
+
+
+def _voltages(output):
+    """Return a function setting ``output`` to a different voltage at each call."""
+    state = [0]
+
+    def call():
+        output.voltage(state[0] / 10)
+        state[0] = (state[0] + 1) % 100
+
+    return call
+
+
+# name --> function to benchmark. The outputs and the display are given changing values so that
+# nothing is skipped as unchanged.
+BENCHMARKS = {
+    "OutputDAC.voltage": _voltages(cv3),
+    "OutputPWM.voltage": _voltages(cv1),
+    "AnalogueInput.read_voltage": ain.read_voltage,
+    "Knob.read_position": k1.read_position,
+    "Display.centre_text": _alternate(lambda: oled.centre_text("benchmark\n1"), lambda: oled.centre_text("benchmark\n2")),
+    "MCP4728._read_registers": europi.dac.dac._read_registers,
+}
+
+
+def run(benchmarks=BENCHMARKS, duration_ms=BENCHMARK_MS):
+    """Run the benchmarks and return the results, with the firmware version and platform."""
+    results = {}
+    for name, func in benchmarks.items():
+        results[name] = measure(func, duration_ms)
+        r = results[name]
+        print(f"{name:28} {r['calls_per_second']:>10} calls/s {r['us_per_call']:>10} us {r['bytes_per_call']:>8} B")
+    return {
+        "version": __version__,
+        "implementation": sys.implementation.name,
+        "platform": sys.platform,
+        "cpu_freq": europi.freq(),
+        "results": results,
+    }
+
+
+def compare(before, after):
+    """Print the change of the time per call between two result files."""
+    with open(before) as f:
+        old = json.load(f)["results"]
+    with open(after) as f:
+        new = json.load(f)["results"]
+    for name in new:
+        if name in old:
+            ratio = new[name]["us_per_call"] / old[name]["us_per_call"]
+            print(
+                f"{name:28} {old[name]['us_per_call']:>10} --> {new[name]['us_per_call']:>10} us  x{ratio:.2f}"
+                f"  {old[name]['bytes_per_call']:>8} --> {new[name]['bytes_per_call']:>8} B"
+            )
+
+
+def main(argv):
+    if len(argv) == 4 and argv[1] == "--compare":
+        compare(argv[2], argv[3])
+        return
+    report = run()
+    path = argv[1] if len(argv) > 1 else f"benchmark-{__version__}.json"
+    with open(path, "w") as f:
+        json.dump(report, f)
+    print(f"saved in {path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,116 @@
+"""Records the duration and the heap use of the boot phases, to find where the time goes between
+power-on and the first loop of a script.
+
+Set ``ENABLED`` to True to record the phases, and run the module: the trace is printed on the
+serial port and saved in ``TRACE_FILE`` when the script starts. Copy the file to a computer and
+summarize it with::
+
+    python boot_trace.py boot_trace.json
+
+The phases are recorded with ``phase()``, and single events with ``mark()``::
+
+    with boot_trace.phase("import europi"):
+        import europi
+
+    boot_trace.mark("script start")
+
+The times are in microseconds since the module was reset. When disabled, nothing is recorded.
+"""
+import gc
+import json
+
+try:
+    from utime import ticks_diff, ticks_us
+except ImportError:
+    pass  # summarizing a trace on a computer
+
+ENABLED = False
+TRACE_FILE = "boot_trace.json"
+
+# [label, depth, start_us, duration_us, free_before, free_after] for each phase and mark
+_records = []
+_depth = 0
+
+
+def _mem_free():
+    return gc.mem_free() if hasattr(gc, "mem_free") else 0
+
+
+class phase:
+    """A context manager recording the duration and the heap use of a boot phase."""
+
+    def __init__(self, label):
+        self.label = label
+
+    def __enter__(self):
+        global _depth
+        if ENABLED:
+            self.record = [self.label, _depth, ticks_us(), 0, _mem_free(), 0]
+            _records.append(self.record)
+            _depth += 1
+        return self
+
+    def __exit__(self, *args):
+        global _depth
+        if ENABLED:
+            _depth -= 1
+            self.record[3] = ticks_diff(ticks_us(), self.record[2])
+            self.record[5] = _mem_free()
+
+
+def mark(label):
+    """Record an event."""
+    if ENABLED:
+        free = _mem_free()
+        _records.append([label, _depth, ticks_us(), 0, free, free])
+
+
+def records():
+    """Return the recorded phases and marks, in the order they started."""
+    return [
+        {
+            "label": label,
+            "depth": depth,
+            "start_us": start,
+            "duration_us": duration,
+            "free_before": before,
+            "free_after": after,
+        }
+        for label, depth, start, duration, before, after in _records
+    ]
+
+
+def dump(path=TRACE_FILE):
+    """Print the trace on the serial port and save it in ``path`` (or only print it if ``path``
+    is None)."""
+    if not ENABLED:
+        return
+    trace = records()
+    print_summary(trace)
+    if path:
+        try:
+            with open(path, "w") as file:
+                json.dump(trace, file)
+        except OSError as e:
+            print(f"Unable to save the boot trace in {path}: {e}")
+
+
+def print_summary(trace):
+    """Print a trace as a table: start time, duration and heap used by each phase."""
+    print(f"{'start ms':>9} {'duration ms':>12} {'heap kB':>8}  phase")
+    for record in trace:
+        used = (record["free_before"] - record["free_after"]) / 1024
+        print(
+            f"{record['start_us'] / 1000:>9.1f} {record['duration_us'] / 1000:>12.1f} {used:>8.1f}  "
+            f"{'  ' * record['depth']}{record['label']}"
+        )
+    top = [record for record in trace if record["depth"] == 0 and record["duration_us"]]
+    if top:
+        print(f"total: {sum(record['duration_us'] for record in top) / 1000:.1f} ms in top-level phases")
+
+
+if __name__ == "__main__":
+    import sys
+
+    with open(sys.argv[1] if len(sys.argv) > 1 else TRACE_FILE) as file:
+        print_summary(json.load(file))
@@ -1,21 +1,31 @@
 import gc
+import json
+import os
+import sys
 import time
 from collections import OrderedDict
 
-import machine
 
+import boot_trace
 import europi
+import persistence
 from europi import (
+    reset_module,
     reset_state,
     OLED_HEIGHT,
     OLED_WIDTH,
     oled,
 )
 from europi_script import EuroPiScript
+from file_utils import load_file, load_json_data
+from version import __version__
 
 from utils.ui import Menu
 
 SCRIPT_DIR = "/lib/contrib/"
+SCRIPT_INDEX_FILE = "script_index.json"
+# Minimum free heap to start the selected script without a reset.
+LAUNCH_MIN_FREE_HEAP = 64 * 1024
 REG_FILE_CODE = 0x8000
 DEBUG = False
 
@@ -55,6 +65,11 @@ class BootloaderMenu(EuroPiScript):
 
     * Hold both buttons for at least 0.5s and release to return to the menu.
 
+    The menu is built from an index of the scripts' display names, see ``load_script_index()``, and
+    only the selected script is imported. The script is then started without resetting the module,
+    unless there is less than ``LAUNCH_MIN_FREE_HEAP`` bytes of free heap or the script runs out of
+    memory while starting: the module is then reset to start it with a clean heap.
+
     :param scripts: a list of qualified class names of Classes implementing EuroPiScript to be included in the menu
     """
 
@@ -78,27 +93,91 @@ class BootloaderMenu(EuroPiScript):
             )
             return None
 
+    @staticmethod
+    def _module_stat(module):
+        """Return the (mtime, size) of the module's source or compiled file, or None if it is not
+        found in the filesystem."""
+        path = module.replace(".", "/")
+        for directory in sys.path:
+            for extension in (".py", ".mpy"):
+                try:
+                    stat = os.stat(f"{directory}/{path}{extension}" if directory else f"{path}{extension}")
+                    return [stat[8], stat[6]]
+                except OSError:
+                    pass
+        return None
+
     @classmethod
-    def load_script_classes(cls, scripts) -> "dict(str, type)":
-        classes = {}
+    def load_script_index(cls, scripts) -> "OrderedDict(str, str)":
+        """Return the display names of the scripts, mapped to their qualified class names.
+
+        The display names are kept in ``SCRIPT_INDEX_FILE`` with the modification time and size of
+        each script's module, so that a script is only imported again when its file changes (or
+        when the firmware version changes, for the frozen modules). The modules imported to update
+        the index are unloaded, except the modules that were already imported before.
+        """
+        index = load_json_data(load_file(SCRIPT_INDEX_FILE))
+        if index.get("version") != __version__:
+            index = {"version": __version__, "scripts": {}}
+        entries = index["scripts"]
+        changed = False
         for i, script in enumerate(scripts):
-            with PrintMemoryUse(script):
-                clazz = cls.get_class_for_name(script)
-            if clazz:
-                classes[script] = clazz
+            module = script.rsplit(".", 1)[0]
+            stat = cls._module_stat(module)
+            entry = entries.get(script)
+            if entry is None or entry["stat"] != stat:
+                with PrintMemoryUse(script), boot_trace.phase(f"import {script}"):
+                    loaded = set(sys.modules)
+                    clazz = cls.get_class_for_name(script)
+                    name = clazz.display_name() if clazz and cls._is_europi_script(clazz) else None
+                    entries[script] = {"name": name, "stat": stat}
+                    changed = True
+                    clazz = None
+                    cls._unload_modules(loaded)
             cls.show_progress(i / len(scripts))
-        return classes
+        for script in list(entries):
+            if script not in scripts:
+                del entries[script]
+                changed = True
+        if changed:
+            cls._save_script_index(index)
+        return OrderedDict(
+            [(entries[script]["name"], script) for script in scripts if entries[script]["name"]]
+        )
+
+    @staticmethod
+    def _unload_modules(loaded):
+        """Unload the modules imported since the names of the modules ``loaded`` were taken."""
+        for name in [name for name in sys.modules if name not in loaded]:
+            del sys.modules[name]
+            package, _, attribute = name.rpartition(".")
+            if package in loaded:
+                # the package that was already imported keeps a reference to its new submodule
+                try:
+                    delattr(sys.modules[package], attribute)
+                except AttributeError:
+                    pass
+
+    @staticmethod
+    def _save_script_index(index):
+        try:
+            with open(SCRIPT_INDEX_FILE, "w") as file:
+                json.dump(index, file)
+        except OSError as e:
+            print(f"Unable to save the script index: {e}")
+
+    @classmethod
+    def remove_from_script_index(cls, script):
+        """Remove a script from ``SCRIPT_INDEX_FILE``, so that it is imported again the next time
+        the index is loaded."""
+        index = load_json_data(load_file(SCRIPT_INDEX_FILE))
+        if index.get("scripts", {}).pop(script, None) is not None:
+            cls._save_script_index(index)
 
     @classmethod
     def _is_europi_script(cls, c):
         return issubclass(c, EuroPiScript)
 
-    @staticmethod
-    def _build_scripts_mapping(classes):
-        return OrderedDict(
-            [(cls.display_name(), cls) for cls in classes if BootloaderMenu._is_europi_script(cls)]
-        )
-
     def launch(self, selected_item):
         self.run_request = selected_item
 
@@ -106,42 +185,76 @@ class BootloaderMenu(EuroPiScript):
         self.remove_state()
         # Attempt to save the state of this script if it has been implemented.
         self.save_state()  # TODO: isn't this the wrong state?
-        machine.reset()  # why doesn't machine.soft_reset() work anymore?
+        reset_module()  # why doesn't machine.soft_reset() work anymore?
 
     def run_menu(self) -> type:
-        # load menu classes
-        script_classes = self.load_script_classes(self.scripts)
-        scripts_mapping = BootloaderMenu._build_scripts_mapping(script_classes.values())
-        self.menu = Menu(
-            items=list(sorted(scripts_mapping.keys())),
-            select_func=self.launch,
-            select_knob=europi.k2,
-            choice_buttons=[europi.b1, europi.b2],
-        )
+        while True:
+            # load the menu from the script index, only the selected script is imported
+            with boot_trace.phase("load script index"):
+                scripts_mapping = self.load_script_index(self.scripts)
+            self.menu = Menu(
+                items=list(sorted(scripts_mapping.keys())),
+                select_func=self.launch,
+                select_knob=europi.k2,
+                choice_buttons=[europi.b1, europi.b2],
+            )
 
-        # let the user make a selection
-        old_selected = -1
-        while not self.run_request:
-            if old_selected != self.menu.selected:
-                old_selected = self.menu.selected
-                self.menu.draw_menu()
-            time.sleep(0.1)
-        return scripts_mapping[self.run_request]
+            # let the user make a selection
+            old_selected = -1
+            while not self.run_request:
+                if old_selected != self.menu.selected:
+                    old_selected = self.menu.selected
+                    self.menu.draw_menu()
+                time.sleep(0.1)
+
+            script = scripts_mapping[self.run_request]
+            script_class = self.get_class_for_name(script)
+            if script_class:
+                return script_class
+            # The script was removed or broken since it was indexed: index it again and show the
+            # menu without it.
+            self.remove_from_script_index(script)
+            self.run_request = None
 
     def main(self):
         script_class_name = self.load_state_str()
         script_class = None
 
         if script_class_name:
-            script_class = self.get_class_for_name(script_class_name)
+            with boot_trace.phase(f"import {script_class_name}"):
+                script_class = self.get_class_for_name(script_class_name)
 
+        launched = False
         if not script_class:
             script_class = self.run_menu()
-            self.save_state_str(f"{script_class.__module__}.{script_class.__name__}")
-            machine.reset()
-        else:
-            # setup the exit handlers, and execute the selection
-            europi.b1._handler_both(europi.b2, self.exit_to_menu)
-            europi.b2._handler_both(europi.b1, self.exit_to_menu)
-
-            script_class().main()
+            script_class_name = f"{script_class.__module__}.{script_class.__name__}"
+            # Saved so that the script is started again on the next boot.
+            self.save_state_str(script_class_name)
+            self.flush_state()
+            # Start the script in-process: remove the menu's handlers and free its memory.
+            self.menu = None
+            reset_state()
+            gc.collect()
+            if gc.mem_free() < LAUNCH_MIN_FREE_HEAP:
+                reset_module()
+            launched = True
+
+        # setup the exit handlers, and execute the selection
+        europi.b1._handler_both(europi.b2, self.exit_to_menu)
+        europi.b2._handler_both(europi.b1, self.exit_to_menu)
+
+        try:
+            with boot_trace.phase(f"{script_class_name} init"):
+                script = script_class()
+        except MemoryError:
+            if not launched:
+                raise
+            # The heap is too fragmented after the menu, start the script after a reset.
+            reset_module()
+        boot_trace.mark("script start")
+        boot_trace.dump()
+        try:
+            script.main()
+        finally:
+            # Write the states saved by the script but not written yet.
+            persistence.flush_all()
@@ -5,17 +5,30 @@ date: 2023-05-20
 labels: calibration
 
 The output calibration is fully automatic and no fine tuning can be done or is necessary.
+The codes of the calibration points are searched by ``utils.dac_calibration``.
+
+The calibration points are every ``step_mv`` millivolts (config). With the ``segments`` model the
+code of each point is measured, with the ``polynomial`` model the codes are computed by a
+polynomial fitted on a sweep of the output. The maximum and RMS errors of the calibration, measured
+by a sweep of the output, are displayed and printed for each channel.
 """
 from time import sleep
 
-from utils.calibrator import Calibrator
+import calibration_store
+import configuration
+from calibration_store import INPUT_CALIBRATION_VALUES
+from utils import calibration_model
+from utils.calibrator import Calibrator, segment_index
+from utils.dac_calibration import DAC_MAX_CODE, DacCalibration
 from europi import oled, k1, k2, dac, DAC_CHANNEL, EUROPI_OUTPUT_6, EUROPI_OUTPUT_5, EUROPI_OUTPUT_4, EUROPI_OUTPUT_3
 
-try:
-    from input_calibration_values import INPUT_CALIBRATION_VALUES
-except ImportError:
-    print("using default calibrations values from INPUT_CALIBRATION_VALUES")
-    from default_calibration import INPUT_CALIBRATION_VALUES
+
+# calibrated range of the outputs
+CALIBRATION_MAX_MV = 10000
+# codes between the measurements of the sweep
+SWEEP_STEP = 32
+# the readings above this voltage may be clipped by the input
+SWEEP_MAX_MV = 11500
 
 
 class CalibrateDAC(Calibrator):
@@ -25,10 +38,17 @@ class CalibrateDAC(Calibrator):
         """Push this script to the end of the menu."""
         return "~Calibrate DAC"
 
+    @classmethod
+    def config_points(cls):
+        return [
+            # millivolts between the calibration points
+            configuration.integer(name="step_mv", range=range(50, 1001, 50), default=250),
+            configuration.choice(name="model", choices=["segments", "polynomial"], default="segments"),
+        ]
+
     def __init__(self):
         super().__init__()
 
-        self.file_created = False
         self.compute_ain_gradients(INPUT_CALIBRATION_VALUES)
 
         # fmt: off
@@ -50,10 +70,7 @@ class CalibrateDAC(Calibrator):
         pass
 
     def reading_to_voltage(self, reading):
-        try:
-            index = next(index for index, v in enumerate(INPUT_CALIBRATION_VALUES) if v >= reading) - 1
-        except StopIteration:
-            index = len(INPUT_CALIBRATION_VALUES) - 1
+        index = segment_index(INPUT_CALIBRATION_VALUES, reading)
         if index < 0:
             cv = 0
         else:
@@ -61,10 +78,7 @@ class CalibrateDAC(Calibrator):
         return max(min(cv, 12), 0)
 
     def cv_to_reading(self, cv):
-        try:
-            index = next(index for index, v in enumerate(self.points) if v >= cv) - 1
-        except StopIteration:
-            index = len(self.points) - 1
+        index = segment_index(self.points, cv)
         if index < 0:
             return INPUT_CALIBRATION_VALUES[0]
         else:
@@ -88,57 +102,40 @@ class CalibrateDAC(Calibrator):
             f"0 V (DAC)",
             "please wait..."
         )
-        dac_value = 0
-        cal_values = [dac_value]
-        # cv1.duty_u16(duty)
 
-        ch.value = dac_value
-        sleep(0.5)
-        reading = self.sample_ain()
-        self.center_text(
-            f"Cal {0}V (DAC {channel})",
-            f"adc: {reading}",
-            f"ain: {self.reading_to_voltage(reading):0.3} V"
-        )
-        for v in range(1, 11):
-            expected_reading = self.cv_to_reading(v)
-            _v = round((4096 / (3.3*3.2)) * 0.9)      # 3.3 is the DAC Vcc, 3.2 is the output stage gain
-            while abs(reading - expected_reading) > 0.002 and reading < expected_reading:
-                # The closer we get to the expected voltage (reading), the finer
-                # we adjust (increase) the CV1 duty cycle and we also give CV1
-                # a little more time to stabilize.
-                # wait = 0
-                if reading / expected_reading < 0.5:
-                    dac_value += 100
-                elif reading / expected_reading < 0.8:
-                    dac_value += 50
-                elif reading / expected_reading < 0.95:
-                    dac_value += 10
-                # elif reading / expected_reading < 0.99:
-                #     dac_value += 20
-                #     wait = 0.1
-                else:
-                    dac_value += 1
-                #     wait = 0.2
-                # dac_value += 1
-                wait = 0.1
-                ch.value = dac_value
-                if wait:
-                    sleep(wait)  # wait for the output to stabilize
-                reading = self.sample_ain()
-                self.center_text(
-                    f"Cal {v}V (DAC {channel})",
-                    f"{dac_value} {(reading/expected_reading*100):0.1f}%",
-                    f"ain: {self.reading_to_voltage(reading):0.2f} V",
-                )
-            cal_values.append(dac_value)
-            # Display the result before continuing with the next calibration point :
+        step_mv = self.config["step_mv"]
+
+        def write(code):
+            ch.value = code
+
+        def display_point(index, dac_value, reading):
             self.center_text(
-                f"Cal {v}V (DAC {channel})",
+                f"Cal {index * step_mv / 1000:0.2f}V (DAC {channel})",
                 f"dac = {dac_value}",
                 f"ain: {self.reading_to_voltage(reading):0.2f} V"
             )
-            sleep(1)
+
+        def to_millivolts(reading):
+            millivolts = self.reading_to_voltage(reading) * 1000
+            return millivolts if millivolts < SWEEP_MAX_MV else None
+
+        calibration = DacCalibration(write, self.sample_ain)
+        calibration.measure_noise(0)
+        codes, millivolts = calibration_model.sweep(calibration.measure, range(0, DAC_MAX_CODE + 1, SWEEP_STEP), to_millivolts)
+        if self.config["model"] == "polynomial":
+            polynomial = calibration_model.fit_polynomial(millivolts, codes)
+            cal_values = calibration_model.polynomial_table(polynomial, step_mv, CALIBRATION_MAX_MV, DAC_MAX_CODE)
+        else:
+            targets = [self.cv_to_reading(mv / 1000) for mv in range(0, CALIBRATION_MAX_MV + 1, step_mv)]
+            cal_values = calibration.calibrate(targets, display_point, step_mv)
+        max_error, rms_error = calibration_model.errors(cal_values, step_mv, codes, millivolts)
+        print(f"DAC {channel}: {cal_values}, error max {max_error:.1f} mV, RMS {rms_error:.1f} mV")
+        self.center_text(
+            f"DAC {channel} error (mV)",
+            f"max: {max_error:.1f}",
+            f"RMS: {rms_error:.1f}"
+        )
+        sleep(2)
         return cal_values
 
     def reset_dac_output(self, channel):
@@ -169,13 +166,7 @@ class CalibrateDAC(Calibrator):
             "saving values",
             "        B2:next"
         )
-        with open(f"lib/dac_calibration_values.py", "a+") as file:
-            if not self.file_created:
-                # first channel, declare the output data structure:
-                file.write(f"\nOUTPUT_DAC_CALIBRATION_VALUES = [None, None, None, None]\n")
-                self.file_created = True
-            values = ", ".join(map(str, cal_values))
-            file.write(f"OUTPUT_DAC_CALIBRATION_VALUES[{channel}] = [{values}]\n")
+        calibration_store.save_dac_channel(channel, cal_values, self.config["step_mv"])
         sleep(1)
         self.center_text(
             f"DAC ch.{channel} OK",
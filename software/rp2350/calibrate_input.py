@@ -19,7 +19,8 @@ from time import sleep
 
 import time
 
-from utils.calibrator import Calibrator
+import calibration_store
+from utils.calibrator import Calibrator, segment_index
 from europi import oled, k1, k2
 from utils.simple_state_machine import STATE_END
 
@@ -70,10 +71,7 @@ class CalibrateInput(Calibrator):
         # fmt: on
 
     def reading_to_voltage(self, reading):
-        try:
-            index = next(index for index, v in enumerate(self.readings) if v >= reading) - 1
-        except StopIteration:
-            index = len(self.readings) - 1
+        index = segment_index(self.readings, reading)
         if index < 0:
             cv = 0
         else:
@@ -82,9 +80,7 @@ class CalibrateInput(Calibrator):
 
     def save_on_disk(self):
         oled.centre_text("Saving values...")
-        with open(f"lib/input_calibration_values.py", "w") as file:
-            file.write(f"INPUT_CALIBRATION_POINTS = {self.points}\n")
-            file.write(f"INPUT_CALIBRATION_VALUES = {self.readings}\n")
+        calibration_store.save_input(self.points, self.readings)
         self.center_text(
             "Saving done."
         )
@@ -0,0 +1,199 @@
+"""
+Binary storage of the calibration values.
+
+The calibration values are stored in ``CALIBRATION_FILE``: a 12-byte header followed by blocks of
+16-bit values, one block per calibration table::
+
+    header: magic "EPCL", format version (B), number of blocks (B), reserved (H),
+            CRC32 of the blocks (I)
+    block:  block id (B), number of values (B), values (array('H'), little endian)
+
+The blocks are read with ``readinto()`` into preallocated arrays, so loading the calibration neither
+compiles Python code nor builds lists. The file is written to a temporary file which is then
+renamed over the previous one, so a power loss while saving keeps the previous calibration.
+
+The values are exposed as ``INPUT_CALIBRATION_POINTS``, ``INPUT_CALIBRATION_VALUES``,
+``OUTPUT_CALIBRATION_VALUES`` and ``OUTPUT_DAC_CALIBRATION_VALUES``, like the calibration modules
+they replace. The DAC values of each channel are the values at 0, 1, 2... volts, or every
+``OUTPUT_DAC_CALIBRATION_STEPS[channel]`` millivolts when the channel was calibrated with more
+points. If the file does not exist, the values are read from these modules
+(``lib/input_calibration_values.py``, ``lib/calibration_values.py`` and
+``lib/dac_calibration_values.py``) and saved in the binary file by ``migrate()``, once, so that the
+next boots do not compile the modules. Without the file nor the modules, the values are taken from
+``default_calibration``, and the file is not written.
+"""
+import os
+import struct
+from array import array
+
+from binascii import crc32
+
+from default_calibration import INPUT_CALIBRATION_VALUES as _DEFAULT_INPUT
+from default_calibration import OUTPUT_CALIBRATION_VALUES as _DEFAULT_PWM
+from default_calibration import OUTPUT_DAC_CALIBRATION_VALUES as _DEFAULT_DAC
+
+CALIBRATION_FILE = "calibration.bin"
+MAGIC = b"EPCL"
+FORMAT_VERSION = 1
+_HEADER = "<4sBBHI"
+_HEADER_SIZE = struct.calcsize(_HEADER)
+
+# block ids
+INPUT_POINTS = 0  # input calibration points in millivolts
+INPUT = 1  # ADC readings at the input calibration points
+OUTPUT_PWM = 2  # PWM duty cycles of outputs 1 and 2 at 0, 1, 2... volts
+OUTPUT_DAC = 3  # DAC values of channel 0 at 0, 1, 2... volts, then channels 1, 2 and 3 (ids 4 to 6)
+OUTPUT_DAC_STEPS = 7  # millivolts between the DAC values of each channel, if not 1000
+
+DEFAULT_DAC_STEP_MV = 1000
+MAX_BLOCK_VALUES = 255  # the number of values of a block is stored in a byte
+
+
+def load(path=CALIBRATION_FILE):
+    """Return a dict mapping the block ids to arrays of values, or None if the file is missing,
+    has another format version or is corrupted."""
+    try:
+        file = open(path, "rb")
+    except OSError:
+        return None
+    try:
+        header = file.read(_HEADER_SIZE)
+        if len(header) != _HEADER_SIZE:
+            return None
+        magic, version, count, _, crc = struct.unpack(_HEADER, header)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            return None
+        blocks = {}
+        check = 0
+        block_header = bytearray(2)
+        for _ in range(count):
+            if file.readinto(block_header) != 2:
+                return None
+            values = array("H", bytes(2 * block_header[1]))
+            if file.readinto(values) != 2 * block_header[1]:
+                return None
+            check = crc32(block_header, check)
+            check = crc32(values, check)
+            blocks[block_header[0]] = values
+        if check != crc:
+            return None
+        return blocks
+    finally:
+        file.close()
+
+
+def save(blocks, path=CALIBRATION_FILE):
+    """Save the blocks, a dict mapping the block ids to sequences of values, in ``path``."""
+    data = bytearray()
+    for block_id in sorted(blocks):
+        if len(blocks[block_id]) > MAX_BLOCK_VALUES:
+            raise ValueError(f"a calibration block has at most {MAX_BLOCK_VALUES} values, got {len(blocks[block_id])}")
+        values = array("H", blocks[block_id])
+        data.append(block_id)
+        data.append(len(values))
+        data.extend(values)
+    temp = path + ".tmp"
+    with open(temp, "wb") as file:
+        file.write(struct.pack(_HEADER, MAGIC, FORMAT_VERSION, len(blocks), 0, crc32(data)))
+        file.write(data)
+    os.rename(temp, path)
+
+
+def _update(blocks):
+    current = load() or migrate() or {}
+    current.update(blocks)
+    save(current)
+
+
+def save_input(points, readings):
+    """Save the input calibration: the points in volts and the ADC readings at these points."""
+    _update({INPUT_POINTS: [round(point * 1000) for point in points], INPUT: readings})
+
+
+def save_pwm(values):
+    """Save the calibration of the PWM outputs."""
+    _update({OUTPUT_PWM: values})
+
+
+def save_dac_channel(channel, values, step_mv=DEFAULT_DAC_STEP_MV):
+    """Save the calibration of a DAC channel [0..3]: its values every ``step_mv`` millivolts from
+    0 V."""
+    current = load() or migrate() or {}
+    steps = list(current.get(OUTPUT_DAC_STEPS, [DEFAULT_DAC_STEP_MV] * 4))
+    steps[channel] = step_mv
+    current.update({OUTPUT_DAC + channel: values, OUTPUT_DAC_STEPS: steps})
+    save(current)
+
+
+def _legacy_blocks():
+    """Return the values of the legacy calibration modules as blocks, or None if there are no such
+    modules."""
+    blocks = {}
+    try:
+        from input_calibration_values import INPUT_CALIBRATION_VALUES
+
+        blocks[INPUT] = INPUT_CALIBRATION_VALUES
+        try:
+            from input_calibration_values import INPUT_CALIBRATION_POINTS
+
+            blocks[INPUT_POINTS] = [round(point * 1000) for point in INPUT_CALIBRATION_POINTS]
+        except ImportError:
+            pass
+    except ImportError:
+        pass
+    try:
+        from calibration_values import OUTPUT_CALIBRATION_VALUES
+
+        blocks[OUTPUT_PWM] = OUTPUT_CALIBRATION_VALUES
+    except ImportError:
+        pass
+    try:
+        from dac_calibration_values import OUTPUT_DAC_CALIBRATION_VALUES
+
+        for channel, values in enumerate(OUTPUT_DAC_CALIBRATION_VALUES):
+            if values:
+                blocks[OUTPUT_DAC + channel] = values
+    except ImportError:
+        pass
+    return blocks or None
+
+
+def migrate(path=CALIBRATION_FILE):
+    """Save the values of the legacy calibration modules in ``path`` if it does not exist yet, and
+    return the blocks saved (or None if there is nothing to migrate)."""
+    if load(path) is not None:
+        return None
+    blocks = _legacy_blocks()
+    if not blocks:
+        return None
+    try:
+        save(blocks, path)
+    except OSError as e:
+        print(f"Unable to save the calibration in {path}: {e}")
+    return load(path) or blocks
+
+
+def _values(blocks, block_id, default, name):
+    if block_id in blocks:
+        return blocks[block_id]
+    print(f"using default calibrations values from {name}")
+    return default
+
+
+_blocks = load() or migrate() or {}
+
+INPUT_CALIBRATION_VALUES = _values(_blocks, INPUT, _DEFAULT_INPUT, "INPUT_CALIBRATION_VALUES")
+INPUT_CALIBRATION_POINTS = (
+    [value / 1000 for value in _blocks[INPUT_POINTS]]
+    if INPUT_POINTS in _blocks
+    else list(range(len(INPUT_CALIBRATION_VALUES)))
+)
+OUTPUT_CALIBRATION_VALUES = _values(_blocks, OUTPUT_PWM, _DEFAULT_PWM, "OUTPUT_CALIBRATION_VALUES")
+OUTPUT_DAC_CALIBRATION_VALUES = [
+    _values(_blocks, OUTPUT_DAC + channel, _DEFAULT_DAC[channel], "OUTPUT_DAC_CALIBRATION_VALUES")
+    for channel in range(4)
+]
+OUTPUT_DAC_CALIBRATION_STEPS = (
+    list(_blocks[OUTPUT_DAC_STEPS]) if OUTPUT_DAC_STEPS in _blocks else [DEFAULT_DAC_STEP_MV] * 4
+)
+del _blocks
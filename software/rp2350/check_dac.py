@@ -0,0 +1,189 @@
+"""
+Self-test of the DAC outputs
+labels: calibration
+
+Each DAC output (3 to 6) is patched in turn to the analogue input, and set to the voltages from 0 V
+to 10 V every ``step_mv`` millivolts (config). The error of each voltage is the difference between
+the voltage read by the input and the voltage set, and the output needs a new calibration
+(``CalibrateDAC``) when the maximum error is above ``max_error_mv`` (config). An output is tested in
+a second or two.
+
+The results are appended to ``SELF_TEST_LOG`` as lines of JSON with the number of the run of the
+self-test (the clock of the module is not set at boot, so the time would not order the tests), so
+the drift of the outputs can be followed over time. The drift displayed is the change of the mean
+error since the previous test of the output.
+"""
+import json
+from time import sleep
+
+import configuration
+from calibration_store import INPUT_CALIBRATION_VALUES
+from europi import oled, cvs, DAC_CHANNEL, EUROPI_OUTPUT_3, EUROPI_OUTPUT_6
+from file_utils import load_file
+from persistence import write_file_atomic
+from utils.calibrator import Calibrator
+from utils.dac_calibration import DacCalibration
+
+SELF_TEST_LOG = "dac_self_test.log"
+MAX_LOG_LINES = 200  # the oldest results are removed beyond this number of tests
+MAX_TEST_MV = 10000
+
+
+def load_log():
+    """Return the results logged, oldest first."""
+    results = []
+    for line in load_file(SELF_TEST_LOG).split("\n"):
+        try:
+            results.append(json.loads(line))
+        except ValueError:
+            pass  # empty or interrupted line
+    return results
+
+
+def log_result(result, results):
+    """Append a result to the log, which holds the previous ``results``."""
+    if len(results) >= MAX_LOG_LINES:
+        lines = [json.dumps(previous) for previous in results[-(MAX_LOG_LINES - 1):]]
+        lines.append(json.dumps(result))
+        write_file_atomic(SELF_TEST_LOG, ("\n".join(lines) + "\n").encode())
+    else:
+        with open(SELF_TEST_LOG, "a") as file:
+            file.write(json.dumps(result) + "\n")
+    results.append(result)
+
+
+def previous_result(results, output):
+    """Return the last result logged for an output, or None."""
+    for result in reversed(results):
+        if result["output"] == output:
+            return result
+    return None
+
+
+class CheckDAC(Calibrator):
+
+    @classmethod
+    def display_name(cls):
+        """Push this script to the end of the menu."""
+        return "~Check DAC"
+
+    @classmethod
+    def config_points(cls):
+        return [
+            # millivolts between the voltages tested
+            configuration.integer(name="step_mv", range=range(250, 5001, 250), default=1000),
+            # maximum error of a calibrated output
+            configuration.integer(name="max_error_mv", range=range(1, 201), default=20),
+        ]
+
+    def __init__(self):
+        super().__init__()
+
+        self.compute_ain_gradients(INPUT_CALIBRATION_VALUES)
+        self.output = EUROPI_OUTPUT_3
+        self.results = load_log()
+        self.run = self.results[-1].get("run", 0) + 1 if self.results else 1
+        self.failed = []
+
+        # fmt: off
+        self.m.state("start") \
+            .when("B1").do(self.display_power_reminder).goto("start") \
+            .when("B2").do(self.do_connect_output)
+        self.m.state("connected").when("B2").do(self.do_test_output).goto("tested")
+        self.m.state("tested").when("B2").do(self.do_next_output)
+        self.m.state("all_done").when("B2").do(self.do_reset)
+        # fmt: on
+
+    def save_state(self):
+        pass
+
+    def test_output(self, output):
+        """Test an output [3..6] patched to the analogue input, log and return the result."""
+        cv = cvs[output - 1]
+        millivolts = list(range(0, MAX_TEST_MV + 1, self.config["step_mv"]))
+        test = DacCalibration(cv.voltage_mv, self.sample_ain)
+        test.measure_noise(0)
+        errors = [round(self.reading_to_voltage(test.measure(voltage)) * 1000 - voltage) for voltage in millivolts]
+        cv.off()
+        result = {
+            "run": self.run,
+            "output": output,
+            "channel": DAC_CHANNEL[output],
+            "step_mv": self.config["step_mv"],
+            "errors_mv": errors,
+            "max_mv": max(abs(error) for error in errors),
+            "mean_mv": round(sum(errors) / len(errors), 1),
+        }
+        previous = previous_result(self.results, output)
+        result["drift_mv"] = round(result["mean_mv"] - previous["mean_mv"], 1) if previous else 0
+        log_result(result, self.results)
+        print(json.dumps(result))
+        return result
+
+    # --------------------------------------------------------------------------
+    # STATES
+
+    def display_start_menu(self, action=None):
+        self.center_text(
+            f"      DAC      ",
+            "   self-test   ",
+            "          B2:go"
+        )
+
+    def display_result(self, result):
+        self.center_text(
+            f"Out {result['output']} max {result['max_mv']}mV",
+            f"drift {result['drift_mv']:+.1f}mV",
+            ("Recal!" if result["max_mv"] > self.config["max_error_mv"] else "OK    ") + "   B2:next"
+        )
+
+    def display_summary(self):
+        if self.failed:
+            self.center_text(
+                "Recalibrate out",
+                " ".join(str(output) for output in self.failed),
+                "B2 to restart"
+            )
+        else:
+            self.center_text(
+                "All outputs OK",
+                " ",
+                "B2 to restart"
+            )
+
+    # --------------------------------------------------------------------------
+    # TRANSITIONS
+
+    def do_connect_output(self, action):
+        self.display_connect_output(self.output)
+        return "connected"
+
+    def do_test_output(self, action):
+        self.center_text(
+            f"Testing out {self.output}",
+            "",
+            "please wait..."
+        )
+        result = self.test_output(self.output)
+        if result["max_mv"] > self.config["max_error_mv"]:
+            self.failed.append(self.output)
+        self.display_result(result)
+
+    def do_next_output(self, action):
+        if self.output == EUROPI_OUTPUT_6:
+            self.display_summary()
+            return "all_done"
+        self.output += 1
+        return self.do_connect_output(action)
+
+    def main(self):
+        self.display_start_menu()
+        self.m.start("start")
+        while True:
+            self.m.execute()
+            sleep(0.01)
+
+
+if __name__ == "__main__":
+    oled.contrast(0)  # dim the display
+    CheckDAC().main()
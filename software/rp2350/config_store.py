@@ -0,0 +1,143 @@
+"""
+Storage of the configurations of all the classes in a single file.
+
+The configurations are stored in ``STORE_FILE`` as a log of lines ``<class name> <JSON>``, read
+once into memory at the first access. Saving a configuration appends a line to the log, and a
+line with a class name alone deletes its configuration. When the log reaches twice the size of the
+configurations it holds, it is compacted: rewritten with the last configuration of each class, to a
+temporary file which is then renamed over the log. A line interrupted by a power loss is ignored,
+and removed by compacting the log.
+
+The per-class file ``config/config_<class name>.json``, for example uploaded or edited by the user,
+is imported into the log when the configuration of its class is loaded, if it changed since it was
+last imported: reading the log does not list the directory nor check every file. The files are
+kept: the log records the modification time and the size of each file imported in lines
+``@<file name> <mtime>,<size>``.
+"""
+import json
+import os
+
+from file_utils import load_file
+from persistence import write_file_atomic
+
+CONFIG_DIR = "config"
+STORE_FILE = f"{CONFIG_DIR}/configs.log"
+COMPACT_MIN_SIZE = 1024  # the log is not compacted below this size
+
+# class name --> JSON string, loaded at the first access
+_entries = None
+# config file name --> "mtime,size" of the file when it was imported
+_imported = {}
+_log_size = 0
+
+
+def _read_log():
+    global _entries, _log_size
+    _entries = {}
+    data = load_file(STORE_FILE)
+    lines = data.split("\n")
+    # the last line is empty, or was interrupted by a power loss
+    for line in lines[:-1]:
+        name, _, value = line.partition(" ")
+        if name.startswith("@"):
+            _imported[name[1:]] = value
+        elif value:
+            _entries[name] = value
+        else:
+            _entries.pop(name, None)
+    _log_size = len(data)
+    if lines[-1]:
+        compact()
+
+
+def _import_config_file(name):
+    """Import the config file of the class ``name`` if it changed since it was last imported."""
+    filename = f"config_{name}.json"
+    path = f"{CONFIG_DIR}/{filename}"
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return
+    signature = f"{stat[8]},{stat[6]}"
+    if _imported.get(filename) == signature:
+        return
+    # recorded even if the file is invalid, so that the error is only printed once
+    _imported[filename] = signature
+    lines = f"@{filename} {signature}\n"
+    try:
+        # dumped again as a single line
+        value = json.dumps(json.loads(load_file(path)))
+        _entries[name] = value
+        lines = f"{name} {value}\n" + lines
+    except ValueError as e:
+        print(f"Unable to import the configuration {path}: {e}")
+    _write(lines)
+
+
+def _entries_loaded():
+    if _entries is None:
+        _read_log()
+    return _entries
+
+
+def load(name: str) -> str:
+    """Return the JSON configuration of the class ``name``, or None if it has none."""
+    entries = _entries_loaded()
+    _import_config_file(name)
+    return entries.get(name)
+
+
+def save(name: str, value: str):
+    """Save the JSON configuration of the class ``name``."""
+    _append(name, value)
+
+
+def delete(name: str):
+    """Delete the configuration of the class ``name``."""
+    if name in _entries_loaded():
+        _append(name, "")
+
+
+def _append(name, value):
+    entries = _entries_loaded()
+    if value:
+        entries[name] = value
+    else:
+        entries.pop(name, None)
+    _write(f"{name} {value}\n" if value else f"{name}\n")
+
+
+def _write(lines):
+    """Append ``lines`` to the log, and compact it if needed."""
+    global _log_size
+    if not _log_size:
+        _make_config_dir()
+    with open(STORE_FILE, "a") as file:
+        file.write(lines)
+    _log_size += len(lines)
+    if _log_size > max(COMPACT_MIN_SIZE, 2 * _live_size()):
+        compact()
+
+
+def _live_size():
+    return sum(len(name) + len(value) + 2 for name, value in _entries.items()) + sum(
+        len(filename) + len(signature) + 3 for filename, signature in _imported.items()
+    )
+
+
+def _make_config_dir():
+    try:
+        os.mkdir(CONFIG_DIR)
+    except OSError:
+        pass
+
+
+def compact():
+    """Rewrite the log with the last configuration of each class."""
+    global _log_size
+    data = "".join(f"{name} {value}\n" for name, value in _entries_loaded().items()) + "".join(
+        f"@{filename} {signature}\n" for filename, signature in _imported.items()
+    )
+    _make_config_dir()
+    write_file_atomic(STORE_FILE, data.encode())
+    _log_size = len(data)
@@ -8,9 +8,9 @@ The `ConfgSpec` is a collection of `ConfigPoints`. Each ConfigPoint consists of
 of the valid values that it may have. There are several different types of COnfigPoints available.
 """
 
-import os
 import json
-from file_utils import load_file, delete_file, load_json_data
+import config_store
+from file_utils import delete_file, load_json_data
 from collections import namedtuple
 
 Validation = namedtuple("Validation", "is_valid message")
@@ -58,9 +58,13 @@ class ChoiceConfigPoint(ConfigPoint):
             raise ValueError("default value must be available in given choices")
         super().__init__(name=name, type="choice", default=default)
         self.choices = choices
+        try:
+            self._valid_choices = set(choices)
+        except TypeError:  # unhashable choices
+            self._valid_choices = choices
 
     def validate(self, value) -> Validation:
-        result = value in self.choices
+        result = value in self._valid_choices
         if not result:
             return Validation(
                 is_valid=result,
@@ -79,7 +83,29 @@ class IntegerConfigPoint(ChoiceConfigPoint):
     """
 
     def __init__(self, name: str, range: range, default: int):
-        super().__init__(name=name, choices=list(range), default=default)
+        # The range is validated by its bounds and step, without building the list of its values.
+        ConfigPoint.__init__(self, name=name, type="choice", default=default)
+        self.choices = range
+        self._count = len(range)
+        self._start = range[0] if self._count else 0
+        self._step = range[1] - range[0] if self._count > 1 else 1
+        if not self._in_range(default):
+            raise ValueError("default value must be available in given choices")
+
+    def _in_range(self, value) -> bool:
+        if not isinstance(value, int):
+            return False
+        offset = value - self._start
+        return offset % self._step == 0 and 0 <= offset // self._step < self._count
+
+    def validate(self, value) -> Validation:
+        if not self._in_range(value):
+            stop = self._start + self._count * self._step
+            return Validation(
+                is_valid=False,
+                message=f"Value '{value}' is not in valid range: range({self._start}, {stop}, {self._step})",
+            )
+        return VALID
 
 
 def choice(name: str, choices: "List", default) -> ChoiceConfigPoint:
@@ -141,12 +167,20 @@ class ConfigSpec:
         return VALID
 
 
+# class --> (saved JSON config, config) of the configurations loaded
+_config_cache = {}
+
+
 class ConfigFile:
-    """A class containing functions for dealing with configuration files."""
+    """A class containing functions for dealing with configuration files.
+
+    The configurations of all the classes are stored in a single file by `config_store`. Config
+    files uploaded or edited in the `/config` directory are imported in this file when they change.
+    """
 
     @staticmethod
     def config_filename(cls):
-        """Returns the filename for teh config file for the given class."""
+        """Returns the filename of the config file imported for the given class."""
         return f"config/config_{cls.__qualname__}.json"
 
     @staticmethod
@@ -159,20 +193,29 @@ class ConfigFile:
             script. Only call save state when state has changed and consider
             adding a time since last save check to reduce save frequency.
         """
-        json_str = json.dumps(data)
-        try:
-            os.mkdir("config")
-        except OSError:
-            pass
-        with open(ConfigFile.config_filename(cls), "w") as file:
-            file.write(json_str)
+        config_store.save(cls.__qualname__, json.dumps(data))
 
     @staticmethod
-    def load_config(cls, config_spec: ConfigSpec):
+    def load_config(cls, config_spec: ConfigSpec = None):
         """If this class has config points, this method validates and returns the config dictionary
-        as saved in this class's config file, else, returns an empty dict."""
+        as saved in this class's config file, else, returns an empty dict.
+
+        The configurations are cached until the saved config changes, so loading the configuration
+        of a class again neither parses the JSON nor builds the `ConfigSpec`. If `config_spec` is not
+        given, it is built from the class's `config_points()`."""
+        data = config_store.load(cls.__qualname__)
+        cached = _config_cache.get(cls)
+        if cached and cached[0] == data:
+            return dict(cached[1])
+        if config_spec is None:
+            config_spec = ConfigSpec(cls.config_points())
+        config = ConfigFile._read_config(data, config_spec)
+        _config_cache[cls] = (data, config)
+        return dict(config)
+
+    @staticmethod
+    def _read_config(data: str, config_spec: ConfigSpec):
         if len(config_spec):
-            data = load_file(ConfigFile.config_filename(cls))
             config = config_spec.default_config()
             if not data:
                 return config
@@ -191,5 +234,6 @@ class ConfigFile:
 
     @staticmethod
     def delete_config(cls):
-        """Deletes the config file, effectively resetting to defaults."""
+        """Deletes the saved config and the config file, effectively resetting to defaults."""
+        config_store.delete(cls.__qualname__)
         delete_file(ConfigFile.config_filename(cls))
@@ -16,11 +16,15 @@ Will set the CV output 3 to a voltage of 4.5V.
 import sys
 import time
 
+from array import array
+
 from machine import ADC
 from machine import I2C
 from machine import PWM
 from machine import Pin
+from machine import Timer
 from machine import freq
+from machine import reset as _reset
 
 from mcp4728 import MCP4728
 from ssd1306 import SSD1306_I2C
@@ -30,28 +34,20 @@ from version import __version__
 from framebuf import FrameBuffer, MONO_HLSB
 from europi_config import load_europi_config
 
+import boot_trace
+import persistence
+
 if sys.implementation.name == "micropython":
     TEST_ENV = False  # We're in micropython, so we can assume access to real hardware
 else:
     TEST_ENV = True  # This var is set when we don't have any real hardware, for example in a test or doc generation setting
 
-try:
-    from input_calibration_values import INPUT_CALIBRATION_VALUES
-except ImportError:
-    print("using default calibrations values from INPUT_CALIBRATION_VALUES")
-    from default_calibration import INPUT_CALIBRATION_VALUES
-
-try:
-    from calibration_values import OUTPUT_CALIBRATION_VALUES
-except ImportError:
-    print("using default calibrations values from OUTPUT_CALIBRATION_VALUES")
-    from default_calibration import OUTPUT_CALIBRATION_VALUES
-
-try:
-    from dac_calibration_values import OUTPUT_DAC_CALIBRATION_VALUES
-except ImportError:
-    print("using default calibrations values from OUTPUT_DAC_CALIBRATION_VALUES")
-    from default_calibration import OUTPUT_DAC_CALIBRATION_VALUES
+from calibration_store import (
+    INPUT_CALIBRATION_VALUES,
+    OUTPUT_CALIBRATION_VALUES,
+    OUTPUT_DAC_CALIBRATION_VALUES,
+    OUTPUT_DAC_CALIBRATION_STEPS,
+)
 
 
 # OLED component display dimensions.
@@ -60,6 +56,10 @@ OLED_HEIGHT = 32
 I2C_CHANNEL = 0
 I2C_FREQUENCY = 400000
 
+# SSD1306 addressing commands
+SSD1306_SET_COL_ADDR = 0x21
+SSD1306_SET_PAGE_ADDR = 0x22
+
 # Standard max int consts.
 MAX_UINT16 = 65535
 
@@ -67,6 +67,7 @@ MAX_UINT16 = 65535
 MIN_INPUT_VOLTAGE = 0
 MAX_INPUT_VOLTAGE = 12
 DEFAULT_SAMPLES = 32
+DEFAULT_SAMPLER_FREQ = 1000
 
 # Output voltage range
 MIN_OUTPUT_VOLTAGE = 0
@@ -112,11 +113,25 @@ def clamp(value, low, high):
 
 
 def reset_state():
-    """Return device to initial state with all components off and handlers reset."""
+    """Return device to initial state with all components off, handlers reset and readings unfiltered.
+
+    The states saved by the scripts but not written yet are written.
+    """
+    persistence.flush_all()
+    oled.cancel_pending()
     if not TEST_ENV:
         oled.fill(0)
+    [s.stop() for s in list(_samplers)]
     [cv.off() for cv in cvs]
     [d.reset_handler() for d in (b1, b2, din)]
+    [a.set_filters() for a in (k1, k2, ain)]
+    [a.set_hysteresis(0.0) for a in (k1, k2, ain)]
+
+
+def reset_module():
+    """Write the states saved by the scripts but not written yet, and reset the module."""
+    persistence.flush_all()
+    _reset()
 
 
 def bootsplash():
@@ -137,11 +152,97 @@ def bootsplash():
 # Component classes.
 
 
+class MovingAverage:
+    """An ADC filter returning the average of the last ``size`` values, kept as a running sum."""
+
+    def __init__(self, size=8):
+        if not isinstance(size, int) or size < 1:
+            raise ValueError(f"MovingAverage expects a positive int size, got: {size}")
+        self._values = array("H", bytearray(2 * size))
+        self.reset()
+
+    def reset(self):
+        self._index = 0
+        self._sum = None
+
+    def update(self, value):
+        values = self._values
+        if self._sum is None:
+            # fill the window with the first value instead of ramping up from 0
+            for index in range(len(values)):
+                values[index] = value
+            self._sum = value * len(values)
+        index = self._index
+        self._sum += value - values[index]
+        values[index] = value
+        self._index = (index + 1) % len(values)
+        return (self._sum + (len(values) >> 1)) // len(values)
+
+
+class ExponentialSmoothing:
+    """An ADC filter returning the exponential moving average of the values.
+
+    ``alpha`` is the weight of the newest value, between 0.0 (frozen) and 1.0 (no smoothing).
+    """
+
+    def __init__(self, alpha=0.25):
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError(f"ExponentialSmoothing expects an alpha in ]0, 1], got: {alpha}")
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        self._value = None
+
+    def update(self, value):
+        if self._value is None:
+            self._value = value
+        else:
+            self._value += self.alpha * (value - self._value)
+        return round(self._value)
+
+
+class Median:
+    """An ADC filter returning the median of the last ``size`` values, which removes isolated spikes."""
+
+    def __init__(self, size=3):
+        if not isinstance(size, int) or size < 1:
+            raise ValueError(f"Median expects a positive int size, got: {size}")
+        self._values = [0] * size
+        self.reset()
+
+    def reset(self):
+        self._index = 0
+        self._count = 0
+
+    def update(self, value):
+        self._values[self._index] = value
+        self._index = (self._index + 1) % len(self._values)
+        if self._count < len(self._values):
+            self._count += 1
+        return sorted(self._values[: self._count])[self._count >> 1]
+
+
 class AnalogueReader:
     """A base class for common analogue read methods.
 
     This class in inherited by classes like Knob and AnalogueInput and does
     not need to be used by user scripts.
+
+    The readings can be passed through a chain of filters, which keep their
+    state between calls so that a single ADC read per call is enough for a
+    stable value::
+
+        k1.set_filters(Median(3), ExponentialSmoothing(0.2))
+
+    Any object with an ``update(value)`` method returning the filtered value
+    (and a ``reset()`` method) can be used as a filter.
+
+    ``range()`` and ``choice()`` (and so ``Knob.read_position()``) can use
+    hysteresis to stop the result from flickering between two steps when the
+    reading sits on the boundary between them::
+
+        k1.set_hysteresis(0.25)  # a quarter of a step on each side
     """
 
     def __init__(self, channel, samples=DEFAULT_SAMPLES, deadzone=0.0):
@@ -150,13 +251,69 @@ class AnalogueReader:
         self.set_deadzone(deadzone)
         self._samples = samples
         self._deadzone = deadzone
-
-    def _sample_adc(self, samples=None):
+        # Ring buffer filled by an AnalogueSampler
+        self._ring = None
+        self._ring_index = 0
+        self._ring_sum = 0
+        self._filters = ()
+        self._hysteresis = 0.0
+        self._last_steps = 0
+        self._last_step = 0
+
+    def _attach_ring(self, size):
+        value = self.pin.read_u16()
+        ring = array("H", bytearray(2 * size))
+        for index in range(size):
+            ring[index] = value
+        self._ring_index = 0
+        self._ring_sum = value * size
+        self._ring = ring
+
+    def _detach_ring(self):
+        self._ring = None
+
+    def _push_sample(self):
+        # Called from the sampler's timer callback: must not allocate memory.
+        ring = self._ring
+        value = self.pin.read_u16()
+        index = self._ring_index
+        self._ring_sum += value - ring[index]
+        ring[index] = value
+        index += 1
+        self._ring_index = 0 if index == len(ring) else index
+
+    def _read_adc(self, samples=None):
+        # Returns the average of the ring buffer if sampled in the background.
+        ring = self._ring
+        if ring is not None:
+            return (self._ring_sum + (len(ring) >> 1)) // len(ring)
+        # With filters, a single read is enough unless more samples are requested.
+        if not samples:
+            samples = 1 if self._filters else self._samples
         # Over-samples the ADC and returns the average.
         value = 0
-        for _ in range(samples or self._samples):
+        for _ in range(samples):
             value += self.pin.read_u16()
-        return round(value / (samples or self._samples))
+        return round(value / samples)
+
+    def _sample_adc(self, samples=None):
+        value = self._read_adc(samples)
+        for f in self._filters:
+            value = f.update(value)
+        return value
+
+    def set_filters(self, *filters):
+        """Set the chain of filters applied to the readings, call without argument to remove them."""
+        for f in filters:
+            f.reset()
+        self._filters = filters
+
+    def set_hysteresis(self, hysteresis):
+        """Set the hysteresis of ``range()`` and ``choice()`` as a fraction of a step, from 0.0 to 0.5."""
+        if not isinstance(hysteresis, float) or not 0.0 <= hysteresis <= 0.5:
+            raise ValueError(f"set_hysteresis expects a float value between 0.0 and 0.5, got: {hysteresis}")
+        self._hysteresis = hysteresis
+        self._last_steps = 0
 
     def set_samples(self, samples):
         """Override the default number of sample reads with the given value."""
@@ -183,19 +340,81 @@ class AnalogueReader:
         """Return a value (upper bound excluded) chosen by the current voltage value."""
         if not isinstance(steps, int):
             raise ValueError(f"range expects an int value, got: {steps}")
-        percent = self.percent(samples, deadzone)
-        if int(percent) == 1:
-            return steps - 1
-        return int(percent * steps)
+        return self._step(self.percent(samples, deadzone), steps)
 
     def choice(self, values, samples=None, deadzone=None):
         """Return a value from a list chosen by the current voltage value."""
         if not isinstance(values, list):
             raise ValueError(f"choice expects a list, got: {values}")
-        percent = self.percent(samples, deadzone)
-        if percent == 1.0:
-            return values[-1]
-        return values[int(percent * len(values))]
+        return values[self._step(self.percent(samples, deadzone), len(values))]
+
+    def _step(self, percent, steps):
+        position = percent * steps
+        step = steps - 1 if percent >= 1.0 else int(position)
+        if self._hysteresis and steps == self._last_steps:
+            # Keep the previous step until the position is far enough into another one.
+            last_step = self._last_step
+            if last_step - self._hysteresis <= position < last_step + 1 + self._hysteresis:
+                step = last_step
+        self._last_steps = steps
+        self._last_step = step
+        return step
+
+
+class AnalogueSampler:
+    """Samples analogue readers in the background from a periodic timer.
+
+    Each reader gets a ring buffer of its last ``size`` samples and the running sum of that buffer.
+    Once the sampler is started, the readers' ``percent()``, ``range()``, ``choice()``,
+    ``read_position()`` and ``read_voltage()`` methods return immediately with the average of the
+    buffer instead of reading the ADC ``samples`` times; their ``samples`` parameter is ignored.
+
+    The buffers are filled from the timer callback, one sample per reader every ``1 / freq``
+    seconds, so with the defaults a reading is the average of the last 32ms::
+
+        from europi import AnalogueSampler, ain, k1, k2
+
+        sampler = AnalogueSampler([ain, k1, k2])
+        sampler.start()
+
+    ``timer`` can be any object with the ``init()`` and ``deinit()`` methods of ``machine.Timer``,
+    and ``sample()`` can be called directly to take one sample of every reader, for example to
+    drive the sampler from a script's main loop or from a test.
+
+    The sampler is stopped by ``reset_state()``.
+    """
+
+    def __init__(self, readers, size=DEFAULT_SAMPLES, freq=DEFAULT_SAMPLER_FREQ, timer=None):
+        if not isinstance(size, int) or size < 1:
+            raise ValueError(f"AnalogueSampler expects a positive int size, got: {size}")
+        self.readers = readers
+        self.size = size
+        self.freq = freq
+        self._timer = timer
+
+    def start(self):
+        """Fill the readers' buffers with a first sample and start sampling in the background."""
+        for reader in self.readers:
+            reader._attach_ring(self.size)
+        if self._timer is None:
+            self._timer = Timer()
+        self._timer.init(freq=self.freq, mode=Timer.PERIODIC, callback=self.sample)
+        if self not in _samplers:
+            _samplers.append(self)
+
+    def stop(self):
+        """Stop sampling; the readers go back to reading the ADC at every call."""
+        if self._timer is not None:
+            self._timer.deinit()
+        for reader in self.readers:
+            reader._detach_ring()
+        if self in _samplers:
+            _samplers.remove(self)
+
+    def sample(self, timer=None):
+        """Take one sample of every reader."""
+        for reader in self.readers:
+            reader._push_sample()
 
 
 class AnalogueInput(AnalogueReader):
@@ -213,6 +432,13 @@ class AnalogueInput(AnalogueReader):
     want to process at the maximum speed you can use as little as 1, and the
     processor won't bog down until you get way up into the thousands if you
     wan't incredibly accurate (but quite slow) readings.
+
+    The voltage is computed from the calibration values with a table of the
+    voltage (in millivolts) of every 12-bit ADC code, built at the first
+    reading of the voltage. ``read_voltage_mv()`` returns the voltage as an
+    integer number of millivolts without any floating point math, within 2 mV
+    of the voltage computed from the calibration values (the error is the
+    largest for the readings close to a calibration point).
     """
 
     def __init__(self, pin, min_voltage=MIN_INPUT_VOLTAGE, max_voltage=MAX_INPUT_VOLTAGE):
@@ -232,6 +458,7 @@ class AnalogueInput(AnalogueReader):
                     "The input calibration process did not complete properly. Please complete again with rack power turned on"
                 )
         self._gradients.append(self._gradients[-1])
+        self._mv_table = None  # built by _build_mv_table() at the first reading of the voltage
 
     def percent(self, samples=None):
         """Current voltage as a relative percentage of the component's range."""
@@ -243,9 +470,7 @@ class AnalogueInput(AnalogueReader):
         )
         return max(reading / max_value, 0.0)
 
-    def read_voltage(self, samples=None):
-        raw_reading = self._sample_adc(samples)
-        self.last_reading = raw_reading
+    def _reading_to_voltage(self, raw_reading):
         reading = raw_reading - INPUT_CALIBRATION_VALUES[0]
         max_value = max(
             reading,
@@ -263,6 +488,31 @@ class AnalogueInput(AnalogueReader):
             cv = index + (self._gradients[index] * (raw_reading - INPUT_CALIBRATION_VALUES[index]))
         return clamp(cv, self.MIN_VOLTAGE, self.MAX_VOLTAGE)
 
+    def _build_mv_table(self):
+        # Voltage in mV of each 12-bit ADC code. The last entry is the voltage at the
+        # 16-bit full scale, for the interpolation of the readings above the last code.
+        table = array("H", bytearray(2 * 4097))
+        for code in range(4097):
+            table[code] = max(round(self._reading_to_voltage(min(code << 4, MAX_UINT16)) * 1000), 0)
+        self._mv_table = table
+        return table
+
+    def read_voltage_mv(self, samples=None):
+        """Return the current voltage as an integer number of millivolts."""
+        raw_reading = self._sample_adc(samples)
+        self.last_reading = raw_reading
+        table = self._mv_table
+        if table is None:
+            table = self._build_mv_table()
+        # interpolate between the 12-bit codes, the 4 low bits come from the oversampling
+        code = raw_reading >> 4
+        low = table[code]
+        return low + (((table[code + 1] - low) * (raw_reading & 0xF) + 8) >> 4)
+
+    def read_voltage(self, samples=None):
+        """Return the current voltage in volts."""
+        return self.read_voltage_mv(samples) / 1000
+
 
 class Knob(AnalogueReader):
     """A class for handling the reading of knob voltage and position.
@@ -384,6 +634,10 @@ class DigitalReader:
 
     def reset_handler(self):
         self.pin.irq(handler=None)
+        self._rising_handler = lambda: None
+        self._falling_handler = lambda: None
+        self._both_handler = lambda: None
+        self._other = None
 
     def _handler_both(self, other, func):
         """When this and other are high, execute the both func."""
@@ -483,6 +737,22 @@ class Display(SSD1306_I2C):
 
     To clear the display, simply fill the display with the colour black by using ``oled.fill(0)``
 
+    The display keeps track of the area modified by the drawing methods since
+    the last ``oled.show()``, compares it with the frame on screen, and only
+    sends the pages (8 pixels high rows) and columns that differ to the OLED.
+    Redrawing the whole frame with ``oled.fill(0)`` followed by the same text
+    only sends the characters that changed. Nothing is sent if nothing was
+    drawn, or if the frame is the same as the one on screen. If you modify
+    ``oled.buffer`` directly, use ``oled.refresh()`` to send the whole frame.
+
+    The number of frames sent per second can be limited with
+    ``oled.set_max_fps()`` (or the ``display_max_fps`` EuroPi configuration),
+    which bounds the time spent refreshing the display however often a script
+    calls ``oled.show()``.
+
+    The OLED is checked and initialized the first time something is shown, so
+    that importing europi does not wait for it.
+
     More explanations and tips about the the display can be found in the oled_tips file
     `oled_tips.md <https://github.com/Allen-Synthesis/EuroPi/blob/main/software/oled_tips.md>`_
     """
@@ -495,17 +765,309 @@ class Display(SSD1306_I2C):
         height=OLED_HEIGHT,
         channel=I2C_CHANNEL,
         freq=I2C_FREQUENCY,
+        max_fps=0,
     ):
         i2c = I2C(channel, sda=Pin(sda), scl=Pin(scl), freq=freq)
         self.width = width
         self.height = height
+        # Area modified since the last show(), in pixels, bounds included.
+        self._set_all_dirty()
+        self._filled = False
+        # Area waiting to be sent to the OLED, and frame rate limiting.
+        self._clear_pending()
+        self.set_max_fps(max_fps)
+        self._last_present_ms = time.ticks_ms()
+        self._timer = None
+        self._timer_armed = False
+        self._timer_fired = False
+        self._busy = False
+        # Transfer buffer for the modified area, frame on screen and frame waiting to be sent.
+        self._window = bytearray(width * height // 8)
+        self._front = bytearray(width * height // 8)
+        self._front_valid = False
+        self._back = bytearray(width * height // 8)
+        # The OLED is checked and initialized on first use, see _init_oled().
+        self._initialized = False
+        self._initializing = False
+        super().__init__(self.width, self.height, i2c)
 
-        if len(i2c.scan()) == 0:
+    def init_display(self):
+        """Initialize the OLED on the next show(), or on the next command sent to it."""
+        self._initialized = False
+
+    def _init_oled(self):
+        if len(self.i2c.scan()) == 0:
             if not TEST_ENV:
                 raise Exception(
                     "EuroPi Hardware Error:\nMake sure the OLED display is connected correctly"
                 )
-        super().__init__(self.width, self.height, i2c)
+        # The driver's initialization clears the buffer and shows it: keep the current frame and
+        # send it instead.
+        frame = bytes(self.buffer)
+        self._initializing = True
+        super().init_display()
+        self._initializing = False
+        self._initialized = True
+        self.buffer[:] = frame
+        self.refresh()
+
+    def poweroff(self):
+        if not self._initialized:
+            self._init_oled()
+        super().poweroff()
+
+    def poweron(self):
+        if not self._initialized:
+            self._init_oled()
+        super().poweron()
+
+    def contrast(self, contrast):
+        if not self._initialized:
+            self._init_oled()
+        super().contrast(contrast)
+
+    def invert(self, invert):
+        if not self._initialized:
+            self._init_oled()
+        super().invert(invert)
+
+    def rotate(self, rotate):
+        if not self._initialized:
+            self._init_oled()
+        super().rotate(rotate)
+
+    def _set_all_dirty(self):
+        self._x0 = 0
+        self._y0 = 0
+        self._x1 = self.width - 1
+        self._y1 = self.height - 1
+
+    def _clear_dirty(self):
+        self._x0 = self.width
+        self._y0 = self.height
+        self._x1 = -1
+        self._y1 = -1
+
+    def _dirty(self, x0, y0, x1, y1):
+        if x1 < x0:
+            x0, x1 = x1, x0
+        if y1 < y0:
+            y0, y1 = y1, y0
+        if x0 < self._x0:
+            self._x0 = x0
+        if y0 < self._y0:
+            self._y0 = y0
+        if x1 > self._x1:
+            self._x1 = x1
+        if y1 > self._y1:
+            self._y1 = y1
+
+    def fill(self, c):
+        # The whole frame is compared with the frame on screen by show(), which sends the
+        # pages and columns that changed.
+        self._filled = True
+        super().fill(c)
+
+    def pixel(self, x, y, *c):
+        if c:
+            self._dirty(x, y, x, y)
+        return super().pixel(x, y, *c)
+
+    def hline(self, x, y, w, c):
+        self._dirty(x, y, x + w - 1, y)
+        super().hline(x, y, w, c)
+
+    def vline(self, x, y, h, c):
+        self._dirty(x, y, x, y + h - 1)
+        super().vline(x, y, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        self._dirty(x1, y1, x2, y2)
+        super().line(x1, y1, x2, y2, c)
+
+    def rect(self, x, y, w, h, c, *f):
+        self._dirty(x, y, x + w - 1, y + h - 1)
+        super().rect(x, y, w, h, c, *f)
+
+    def fill_rect(self, x, y, w, h, c):
+        self._dirty(x, y, x + w - 1, y + h - 1)
+        super().fill_rect(x, y, w, h, c)
+
+    def ellipse(self, x, y, xr, yr, c, *args):
+        self._dirty(x - xr, y - yr, x + xr, y + yr)
+        super().ellipse(x, y, xr, yr, c, *args)
+
+    def poly(self, *args):
+        self._set_all_dirty()
+        super().poly(*args)
+
+    def text(self, s, x, y, c=1):
+        self._dirty(x, y, x + len(s) * CHAR_WIDTH - 1, y + CHAR_HEIGHT - 1)
+        super().text(s, x, y, c)
+
+    def blit(self, *args):
+        self._set_all_dirty()
+        super().blit(*args)
+
+    def scroll(self, xstep, ystep):
+        self._set_all_dirty()
+        super().scroll(xstep, ystep)
+
+    def set_max_fps(self, max_fps):
+        """Limit the number of frames sent to the OLED per second, 0 for no limit."""
+        if not isinstance(max_fps, int) or max_fps < 0:
+            raise ValueError(f"set_max_fps expects a positive int value, got: {max_fps}")
+        self._min_interval_ms = 1000 // max_fps if max_fps else 0
+
+    def show(self):
+        """Present the frame drawn in the buffer on the OLED.
+
+        Only the area modified since the last frame is sent, and nothing is sent if the frame is
+        the same as the one on screen. When the frame rate is limited, a frame shown too soon after
+        the previous one is kept aside and sent by a timer when the interval has elapsed; the
+        frames shown in the meantime replace it.
+        """
+        if not self._initialized:
+            if not self._initializing:
+                self._init_oled()
+            return
+        self._busy = True
+        if self._filled:
+            self._filled = False
+            self._set_all_dirty()
+        # Move the drawn area into the area waiting to be sent.
+        if self._x0 <= self._x1:
+            if self._x0 < self._px0:
+                self._px0 = self._x0
+            if self._y0 < self._py0:
+                self._py0 = self._y0
+            if self._x1 > self._px1:
+                self._px1 = self._x1
+            if self._y1 > self._py1:
+                self._py1 = self._y1
+            self._clear_dirty()
+        if self._px0 > self._px1:
+            pass
+        elif self._front_valid and self.buffer == self._front:
+            # Back to the frame on screen: there is nothing to send.
+            self._clear_pending()
+        elif not self._min_interval_ms:
+            self._present(self.buffer)
+        else:
+            self._back[:] = self.buffer
+            wait = self._min_interval_ms - time.ticks_diff(time.ticks_ms(), self._last_present_ms)
+            if wait <= 0:
+                self._present(self._back)
+            elif not self._timer_armed:
+                if self._timer is None:
+                    self._timer = Timer()
+                self._timer_armed = True
+                self._timer.init(mode=Timer.ONE_SHOT, period=wait, callback=self._on_timer)
+        if self._timer_fired:
+            # The timer expired during this call and left the frame for us.
+            self._timer_fired = False
+            if self._px0 <= self._px1:
+                self._present(self._back)
+        self._busy = False
+
+    def _on_timer(self, timer):
+        self._timer_armed = False
+        if self._busy:
+            self._timer_fired = True
+        elif self._px0 <= self._px1:
+            self._present(self._back)
+
+    def cancel_pending(self):
+        """Stop the frame rate timer and drop the frame waiting to be sent, if any."""
+        if self._timer is not None:
+            self._timer.deinit()
+        self._timer_armed = False
+        self._timer_fired = False
+        self._clear_pending()
+
+    def _clear_pending(self):
+        self._px0 = self.width
+        self._py0 = self.height
+        self._px1 = -1
+        self._py1 = -1
+
+    def _present(self, frame):
+        x0 = max(self._px0, 0)
+        y0 = max(self._py0, 0)
+        x1 = min(self._px1, self.width - 1)
+        y1 = min(self._py1, self.height - 1)
+        self._clear_pending()
+        self._last_present_ms = time.ticks_ms()
+        if x0 <= x1 and y0 <= y1:
+            if self._front_valid:
+                window = self._changed_window(frame, x0, y0 >> 3, x1, y1 >> 3)
+                if window:
+                    self._send(frame, *window)
+            else:
+                self._send(frame, x0, y0 >> 3, x1, y1 >> 3)
+        self._front[:] = frame
+        self._front_valid = True
+
+    def _changed_window(self, frame, x0, page0, x1, page1):
+        """Return the pages and columns of the area where ``frame`` differs from the frame on
+        screen, as (x0, page0, x1, page1), or None if they are the same."""
+        front = self._front
+        width = self.width
+        first_column = width
+        last_column = -1
+        first_page = -1
+        last_page = -1
+        for page in range(page0, page1 + 1):
+            row = page * width
+            start = row + x0
+            end = row + x1
+            while start <= end and frame[start] == front[start]:
+                start += 1
+            if start > end:
+                continue
+            while frame[end] == front[end]:
+                end -= 1
+            if first_page < 0:
+                first_page = page
+            last_page = page
+            if start - row < first_column:
+                first_column = start - row
+            if end - row > last_column:
+                last_column = end - row
+        if first_page < 0:
+            return None
+        return first_column, first_page, last_column, last_page
+
+    def _send(self, frame, x0, page0, x1, page1):
+        # Set the column/page window, the OLED fills it row by row.
+        # Narrow displays are centred in the 128 columns of the controller.
+        column_offset = 0 if self.width == 128 else (128 - self.width) // 2
+        self.write_cmd(SSD1306_SET_COL_ADDR)
+        self.write_cmd(x0 + column_offset)
+        self.write_cmd(x1 + column_offset)
+        self.write_cmd(SSD1306_SET_PAGE_ADDR)
+        self.write_cmd(page0)
+        self.write_cmd(page1)
+        frame = memoryview(frame)
+        if x0 == 0 and x1 == self.width - 1:
+            # Full rows are contiguous in the frame buffer.
+            self.write_data(frame[page0 * self.width : (page1 + 1) * self.width])
+            return
+        # Copy the area into a contiguous buffer.
+        width = x1 - x0 + 1
+        window = memoryview(self._window)
+        offset = 0
+        for page in range(page0, page1 + 1):
+            start = page * self.width + x0
+            window[offset : offset + width] = frame[start : start + width]
+            offset += width
+        self.write_data(window[:offset])
+
+    def refresh(self):
+        """Send the whole frame to the OLED."""
+        self._set_all_dirty()
+        self._front_valid = False
+        self.show()
 
     def centre_text(self, text):
         """Split the provided text across 3 lines of display."""
@@ -529,17 +1091,52 @@ class DAC:
     def __init__(self, sda, scl, ldac, addr):
         # LDAC must be low to transfer the value immediately
         self.ldac = Pin(ldac, mode=Pin.OUT, pull=Pin.PULL_DOWN, value=0)
-        self.dac = MCP4728(I2C(1, sda=Pin(sda), scl=Pin(scl), freq=400000), addr)
-        self.dac.a.vref = 0  # 0 (VDD) or 1 (Internal 2.048V)
-        self.dac.a.gain = 1
-        self.dac.b.vref = 0
-        self.dac.b.gain = 1
-        self.dac.c.vref = 0
-        self.dac.c.gain = 1
-        self.dac.d.vref = 0
-        self.dac.d.gain = 1
+        # All channels start at 0 with Vref = VDD (instead of the internal 2.048V) and gain = 1,
+        # set with a single Multi-Write instead of reading the registers and syncing each setting.
+        self.dac = MCP4728(
+            I2C(1, sda=Pin(sda), scl=Pin(scl), freq=400000), addr, cached=True, read_registers=False
+        )
+        self.dac.sync_all()
         # print("DAC initialized")
 
+    def set_all(self, values, latch=False):
+        """Set the 12-bit value of the four DAC channels in a single I2C transaction.
+
+        ``values`` is a sequence of four values for the DAC channels [0..3]; use None to keep
+        the current value of a channel.
+
+        If ``latch`` is True, LDAC is held high during the transfer so that all the outputs
+        change at the same instant when LDAC is pulled low again.
+        """
+        if latch:
+            self.ldac.value(1)
+        self.dac.set_values(values)
+        if latch:
+            self.ldac.value(0)
+
+    def set_voltages(self, voltages, latch=False):
+        """Set the voltage of several DAC outputs in a single I2C transaction.
+
+        ``voltages`` is a dict mapping the DAC outputs to a voltage, for example::
+
+            dac.set_voltages({cv3: 1.0, cv4: 1.25, cv5: 1.5833}, latch=True)
+
+        Returns the list of the 12-bit values sent to the DAC channels [0..3] (None for the
+        channels that were not changed).
+        """
+        values = [None, None, None, None]
+        for output, voltage in voltages.items():
+            values[output.channel] = output._voltage_to_value(voltage)
+        self.set_all(values, latch)
+        return values
+
+    def write_counts(self):
+        """Return the number of writes issued and suppressed for each DAC channel [0..3].
+
+        A write is suppressed when the value is the same as the last value sent to the channel.
+        """
+        return [(channel.writes, channel.suppressed_writes) for channel in self.dac._channels]
+
 
 class Output:
     """A class for sending digital or analogue voltage to an output jack.
@@ -550,11 +1147,89 @@ class Output:
     So that there is no chance of not having the full range, the chosen
     resistor values actually give you a range of about 0-10.5V, which is why
     calibration is important if you want to be able to output precise voltages.
+
+    The voltage can also be given as an integer number of millivolts with the
+    ``cvx.voltage_mv()`` method, which avoids floating point math entirely.
+
+    By default the calibrated output value is interpolated between the
+    calibration points at every call. For scripts that update their outputs
+    very often, ``cvx.build_table()`` precomputes the output value for every
+    millivolt (or every ``resolution`` millivolts) so that the conversion
+    becomes a single table lookup. Each table entry takes 2 bytes, so a 1 mV
+    table for a 0-12V output takes about 24kB of RAM. A coarser table saves
+    memory but is not interpolated: the voltages are rounded to the nearest
+    ``resolution`` millivolts, an error of up to ``resolution / 2`` mV (a
+    DAC step is about 2.6 mV).
     """
 
-    def __init__(self, min_voltage=MIN_OUTPUT_VOLTAGE, max_voltage=MAX_OUTPUT_VOLTAGE):
+    def __init__(self, min_voltage=MIN_OUTPUT_VOLTAGE, max_voltage=MAX_OUTPUT_VOLTAGE, max_value=MAX_UINT16):
         self.MIN_VOLTAGE = min_voltage
         self.MAX_VOLTAGE = max_voltage
+        self._max_value = max_value
+        self._table = None
+        self._table_resolution = 1
+        self._table_scale = 1000.0
+
+    def _init_calibration(self, calibration_values, step_mv=1000):
+        # calibration_values are the output values at 0, step_mv, 2 * step_mv... millivolts
+        self._calibration_values = calibration_values
+        self._step_mv = step_mv
+        self._points_per_volt = 1000 / step_mv
+        self._gradients = []
+        for index, value in enumerate(calibration_values[:-1]):
+            self._gradients.append(calibration_values[index + 1] - value)
+        self._gradients.append(self._gradients[-1])
+
+    def _interpolate(self, voltage):
+        # Voltages above the last calibration point are extrapolated from the last segment.
+        position = voltage * self._points_per_volt
+        index = min(int(position // 1), len(self._calibration_values) - 1)
+        return self._calibration_values[index] + self._gradients[index] * (position - index)
+
+    def _interpolate_mv(self, millivolts):
+        # Same as _interpolate() but with integer millivolts, the result is rounded to the nearest integer.
+        step = self._step_mv
+        index = min(millivolts // step, len(self._calibration_values) - 1)
+        return self._calibration_values[index] + (self._gradients[index] * (millivolts - index * step) + (step >> 1)) // step
+
+    def _mv_to_value(self, millivolts):
+        """Return the calibrated output value for the given integer number of millivolts."""
+        if millivolts == 0:
+            return 0
+        millivolts = clamp(millivolts, int(self.MIN_VOLTAGE * 1000), int(self.MAX_VOLTAGE * 1000))
+        return clamp(self._interpolate_mv(millivolts), 0, self._max_value)
+
+    def build_table(self, resolution=1):
+        """Precompute the calibrated output value for every ``resolution`` millivolts."""
+        if not isinstance(resolution, int) or resolution < 1:
+            raise ValueError(f"build_table expects a positive int value, got: {resolution}")
+        count = int(self.MAX_VOLTAGE * 1000) // resolution + 1
+        table = array("H", bytearray(2 * count))
+        for index in range(count):
+            table[index] = self._mv_to_value(index * resolution)
+        self._table_resolution = resolution
+        self._table_scale = 1000.0 / resolution
+        self._table = table
+
+    def clear_table(self):
+        """Free the precomputed table and go back to interpolating at every call."""
+        self._table = None
+
+    def _lookup(self, voltage):
+        index = int(voltage * self._table_scale + 0.5)
+        if index < 0:
+            return self._table[0]
+        if index >= len(self._table):
+            return self._table[-1]
+        return self._table[index]
+
+    def _lookup_mv(self, millivolts):
+        index = (millivolts + (self._table_resolution >> 1)) // self._table_resolution
+        if index < 0:
+            return self._table[0]
+        if index >= len(self._table):
+            return self._table[-1]
+        return self._table[index]
 
     def on(self):
         """Set the voltage HIGH at 5 volts."""
@@ -584,53 +1259,67 @@ class OutputDAC(Output):
     channel must be 0|1|2|3
     """
 
-    def __init__(self, _dac, channel, min_voltage=MIN_INPUT_VOLTAGE, max_voltage=MAX_INPUT_VOLTAGE):
+    def __init__(
+        self,
+        _dac,
+        channel,
+        min_voltage=MIN_INPUT_VOLTAGE,
+        max_voltage=MAX_INPUT_VOLTAGE,
+        table_resolution=None,
+    ):
         """
         :param channel: DAC channel [0..3]
+        :param table_resolution: if set, build a lookup table with this resolution in millivolts
         """
-        super().__init__(min_voltage, max_voltage)
+        super().__init__(min_voltage, max_voltage, 4095)
         self.dac = _dac
         self.channel = channel
+        self._dac_channel = (_dac.dac.a, _dac.dac.b, _dac.dac.c, _dac.dac.d)[channel]
+        self._init_calibration(OUTPUT_DAC_CALIBRATION_VALUES[channel], OUTPUT_DAC_CALIBRATION_STEPS[channel])
+        if table_resolution:
+            self.build_table(table_resolution)
 
-        self._gradients = []
-        for index, value in enumerate(OUTPUT_DAC_CALIBRATION_VALUES[channel][:-1]):
-            self._gradients.append(OUTPUT_DAC_CALIBRATION_VALUES[channel][index + 1] - value)
-        self._gradients.append(self._gradients[-1])
+    def _voltage_to_value(self, voltage):
+        """Return the calibrated 12-bit DAC value for the given voltage."""
+        if voltage == 0 or voltage is None:
+            return 0
+        if self._table is not None:
+            return self._lookup(voltage)
+        v = round(self._interpolate(clamp(voltage, self.MIN_VOLTAGE, self.MAX_VOLTAGE)))
+        if v > 4095:
+            v = 4095
+        # v = v & 0x0FFF
+        return v
 
     def voltage(self, voltage=None):
-        if voltage == 0 or voltage is None:
-            v = 0
+        """Set the output voltage and return the 12-bit value of the DAC channel.
+
+        The DAC is only written when the value differs from the last value sent to the channel.
+        """
+        v = self._voltage_to_value(voltage)
+        self._dac_channel.value = v
+        return v
+
+    def voltage_mv(self, millivolts):
+        """Set the output voltage in integer millivolts and return the 12-bit value of the DAC channel."""
+        if self._table is not None:
+            v = self._lookup_mv(millivolts)
         else:
-            voltage = clamp(voltage, self.MIN_VOLTAGE, self.MAX_VOLTAGE)
-            index = int(voltage // 1)
-            v = round(OUTPUT_DAC_CALIBRATION_VALUES[self.channel][index] + (self._gradients[index] * (voltage % 1)))
-            if v > 4095:
-                v = 4095
-            # v = v & 0x0FFF
-        if self.channel == 0:
-            self.dac.dac.a.value = v
-        elif self.channel == 1:
-            self.dac.dac.b.value = v
-        elif self.channel == 2:
-            self.dac.dac.c.value = v
-        elif self.channel == 3:
-            self.dac.dac.d.value = v
+            v = self._mv_to_value(millivolts)
+        self._dac_channel.value = v
         return v
-        # setattr(dac, DAC_CHANNELS[self.channel], voltage)
 
 
 class OutputPWM(Output):
 
-    def __init__(self, pin, min_voltage=MIN_INPUT_VOLTAGE, max_voltage=MAX_INPUT_VOLTAGE):
+    def __init__(self, pin, min_voltage=MIN_INPUT_VOLTAGE, max_voltage=MAX_INPUT_VOLTAGE, table_resolution=None):
         super().__init__(min_voltage, max_voltage)
         self.pin = PWM(Pin(pin))
         self.pin.freq(PWM_FREQ)
         self._duty = 0
-
-        self._gradients = []
-        for index, value in enumerate(OUTPUT_CALIBRATION_VALUES[:-1]):
-            self._gradients.append(OUTPUT_CALIBRATION_VALUES[index + 1] - value)
-        self._gradients.append(self._gradients[-1])
+        self._init_calibration(OUTPUT_CALIBRATION_VALUES)
+        if table_resolution:
+            self.build_table(table_resolution)
 
     def _set_duty(self, cycle):
         cycle = int(cycle)
@@ -643,10 +1332,17 @@ class OutputPWM(Output):
             return self._duty / MAX_UINT16
         if voltage == 0:
             self._set_duty(0)
+        elif self._table is not None:
+            self._set_duty(self._lookup(voltage))
         else:
-            voltage = clamp(voltage, self.MIN_VOLTAGE, self.MAX_VOLTAGE)
-            index = int(voltage // 1)
-            self._set_duty(OUTPUT_CALIBRATION_VALUES[index] + (self._gradients[index] * (voltage % 1)))
+            self._set_duty(self._interpolate(clamp(voltage, self.MIN_VOLTAGE, self.MAX_VOLTAGE)))
+
+    def voltage_mv(self, millivolts):
+        """Set the output voltage in integer millivolts."""
+        if self._table is not None:
+            self._set_duty(self._lookup_mv(millivolts))
+        else:
+            self._set_duty(self._mv_to_value(millivolts))
 
     def toggle(self):
         """Invert the Output's current state."""
@@ -658,7 +1354,11 @@ class OutputPWM(Output):
 
 # Initialize EuroPi global singleton instance variables.
 
-europi_config = load_europi_config()
+# Running AnalogueSamplers, stopped by reset_state()
+_samplers = []
+
+with boot_trace.phase("load europi config"):
+    europi_config = load_europi_config()
 
 # change RP2040 power supply mode to reduce noise
 # smps = Pin(23, mode=Pin.OUT, value=1)
@@ -671,9 +1371,10 @@ k2 = Knob(2)            # RP2350 : GPIO27 == ADC channel 2
 b1 = Button(4)
 b2 = Button(5)
 
-oled = Display(0, 1)
+oled = Display(0, 1, max_fps=europi_config["display_max_fps"])
 
-dac = DAC(sda=14, scl=15, ldac=13, addr=0x60)
+with boot_trace.phase("DAC init"):
+    dac = DAC(sda=14, scl=15, ldac=13, addr=0x60)
 
 cv1 = OutputPWM(21)
 cv2 = OutputPWM(20)
@@ -689,4 +1390,5 @@ usb_connected = DigitalReader(24, 0)
 freq(europi_config["cpu_freq"])
 
 # Reset the module state upon import.
-reset_state()
+with boot_trace.phase("reset_state"):
+    reset_state()
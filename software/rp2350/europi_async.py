@@ -0,0 +1,163 @@
+"""Provides a base class for scripts which run independent tasks with asyncio."""
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+try:
+    from utime import ticks_add, ticks_diff, ticks_ms
+except ImportError:
+    # CPython: the ticks do not wrap around
+    from time import monotonic_ns
+
+    def ticks_ms():
+        return monotonic_ns() // 1000000
+
+    def ticks_add(ticks, delta):
+        return ticks + delta
+
+    def ticks_diff(ticks1, ticks2):
+        return ticks1 - ticks2
+
+
+from europi_script import EuroPiScript
+
+try:
+    ThreadSafeFlag = asyncio.ThreadSafeFlag
+except AttributeError:
+    # CPython's asyncio has no ThreadSafeFlag: emulate it for running the scheduler on a host (with
+    # the simulator for the hardware modules), where the "interrupts" are called from the event
+    # loop's thread.
+    class ThreadSafeFlag:
+        def __init__(self):
+            self._event = asyncio.Event()
+
+        def set(self):
+            self._event.set()
+
+        def clear(self):
+            self._event.clear()
+
+        async def wait(self):
+            await self._event.wait()
+            self._event.clear()
+
+
+async def every(period_ms, func):
+    """Call ``func`` every ``period_ms`` milliseconds. ``func`` can be a function or a coroutine
+    function.
+
+    The period is measured from the start of each call, so the rate does not drift with the
+    duration of ``func``. If a call takes longer than the period, the missed calls are skipped.
+    """
+    deadline = ticks_ms()
+    while True:
+        result = func()
+        if result is not None and hasattr(result, "send"):
+            await result
+        deadline = ticks_add(deadline, period_ms)
+        delay = ticks_diff(deadline, ticks_ms())
+        if delay < 0:
+            deadline = ticks_ms()
+            delay = 0
+        await asyncio.sleep(delay / 1000)
+
+
+def edge_flag(reader, falling=False):
+    """Return a ``ThreadSafeFlag`` set by the rising (or falling) edge handler of a ``DigitalReader``
+    such as ``din``, ``b1`` or ``b2``.
+
+    This replaces the reader's current handler for that edge.
+    """
+    flag = ThreadSafeFlag()
+    if falling:
+        reader.handler_falling(flag.set)
+    else:
+        reader.handler(flag.set)
+    return flag
+
+
+async def on_edge(reader, func, falling=False):
+    """Call ``func`` after each rising (or falling) edge of a ``DigitalReader``.
+
+    Unlike a handler, ``func`` runs as a normal task and not in the interrupt, so it can allocate
+    memory and take its time. Edges that happen while ``func`` runs are merged into a single call.
+    """
+    flag = edge_flag(reader, falling)
+    while True:
+        await flag.wait()
+        result = func()
+        if result is not None and hasattr(result, "send"):
+            await result
+
+
+class AsyncEuroPiScript(EuroPiScript):
+    """A base class for scripts which run several independent tasks, for example the CV
+    generation, the input sampling and the display refresh, each at its own rate. A slow task,
+    like a display refresh, then only delays the other tasks while it runs instead of for a full
+    iteration of a main loop.
+
+    Instead of ``main()``, override ``tasks()`` to return the coroutines to run concurrently.
+    The ``every()`` and ``on_edge()`` helpers cover the usual cases::
+
+        from europi import ain, cv1, din, oled
+        from europi_async import AsyncEuroPiScript, every, on_edge
+
+        class Follower(AsyncEuroPiScript):
+            def __init__(self):
+                super().__init__()
+                self.v = 0
+                self.count = 0
+
+            def follow(self):
+                self.v = ain.read_voltage()
+                cv1.voltage(self.v)
+
+            def clock(self):
+                self.count += 1
+
+            def draw(self):
+                oled.fill(0)
+                oled.text(f"{self.v:2.2f}V {self.count}", 0, 0)
+                oled.show()
+
+            def tasks(self):
+                return [
+                    every(5, self.follow),
+                    every(100, self.draw),
+                    on_edge(din, self.clock),
+                ]
+
+
+        if __name__ == "__main__":
+            Follower().main()
+
+    Tasks must not block: use ``await asyncio.sleep()`` instead of ``time.sleep()``.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._tasks = []
+
+    def tasks(self):
+        """Override this method to return the list of coroutines to run concurrently."""
+        raise NotImplementedError
+
+    def main(self):
+        """Run the script's tasks until they all complete, or until ``stop()`` is called."""
+        try:
+            asyncio.run(self.main_async())
+        except asyncio.CancelledError:
+            pass
+
+    async def main_async(self):
+        """Run the script's tasks, for use from an already running event loop."""
+        self._tasks = [asyncio.create_task(coroutine) for coroutine in self.tasks()]
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            self._tasks = []
+
+    def stop(self):
+        """Cancel all the script's tasks."""
+        for task in self._tasks:
+            task.cancel()
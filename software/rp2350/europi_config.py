@@ -1,5 +1,5 @@
 import configuration
-from configuration import ConfigFile, ConfigSpec
+from configuration import ConfigFile
 
 # Pico machine CPU freq.
 # Default pico CPU freq is 125_000_000 (125mHz)
@@ -19,8 +19,10 @@ class EuroPiConfig:
                 choices=[PICO_DEFAULT_CPU_FREQ, OVERCLOCKED_CPU_FREQ],
                 default=OVERCLOCKED_CPU_FREQ,
             ),
+            # Maximum number of frames sent to the OLED per second, 0 for no limit.
+            configuration.integer(name="display_max_fps", range=range(0, 101), default=0),
         ]
 
 
 def load_europi_config():
-    return ConfigFile.load_config(EuroPiConfig, ConfigSpec(EuroPiConfig.config_points()))
+    return ConfigFile.load_config(EuroPiConfig)
@@ -2,9 +2,10 @@
 import os
 import json
 from utime import ticks_diff, ticks_ms
-from configuration import ConfigSpec, ConfigFile
+from configuration import ConfigFile
 from europi_config import EuroPiConfig
 from file_utils import load_file, delete_file, load_json_data
+from persistence import StateSchema, StateWriter
 
 
 class EuroPiScript:
@@ -40,7 +41,7 @@ class EuroPiScript:
 
     When adding ``save_state()`` calls to your script, there are a few important considerations to keep in mind:
 
-        * Frequency of saves - scripts should only save state to disk when state changes, and should not save too frequently because os write operations are expensive in terms of time. Saving too frequently will affect the performance of a script.
+        * Frequency of saves - scripts should only save state when state changes. The saves are not written to disk immediately: the last state saved is written at most ``state_save_delay_ms`` milliseconds after the first unwritten save, and a state identical to the one on disk is not written at all. Encoding the state still takes time, so avoid saving at every iteration of the main loop.
         * Save state file size - The pico only has about 1MB of free space available so save state storage format is important to keep as minimal as possible.
         * No externally influenced input - The instance variables your script saves should not be externally influenced, meaning you should not save the current knob position, current analog input value or current digital input value.
 
@@ -56,7 +57,7 @@ class EuroPiScript:
 
         5. **Implement save_state() method.** Provide an implementation to serialize the state variables into a string, JSON, or bytes an call the appropriate save state method.
 
-        6. **Throttle the frequency of saves.** Saving state too often could negatively impact the performance of your script, so it is advised to add some checks in your code to ensure it doesn't save too frequently.
+        6. **Throttle the frequency of saves.** The writes to disk are coalesced, but encoding the state too often could still impact the performance of your script, so it is advised to add some checks in your code to ensure it doesn't save too frequently. Call ``flush_state()`` to write a pending state immediately.
 
 
     Here is an extension of the script above with some added trivial features that incorporate saving and loading script state::
@@ -99,6 +100,29 @@ class EuroPiScript:
                 oled.centre_text("Hello world")
 
 
+    Scripts saving numbers, or lists of numbers such as sequencer patterns, can save them as a fixed-size binary
+    record instead of JSON. The fields are declared by the ``state_fields()`` method, and saved with
+    ``save_state_packed()``, which packs only the fields given and does not build a string::
+
+        from persistence import StateField
+
+        class Sequencer(EuroPiScript):
+            @classmethod
+            def state_fields(cls):
+                return [
+                    StateField("step", "B", 0),
+                    StateField("pattern", "b", [0] * 16, length=16),
+                ]
+
+            def __init__(self):
+                super().__init__()
+                state = self.load_state_packed()
+                self.step = state["step"]
+                self.pattern = state["pattern"]
+
+            def save_state(self):
+                self.save_state_packed({"step": self.step, "pattern": self.pattern})
+
     .. note::
        EuroPiScripts should not call ``europi.reset_state()`` as this call would remove the button handlers that
        allow the user to exit the program and return to the menu. Similarly, EuroPiScripts should not override the
@@ -133,6 +157,9 @@ class EuroPiScript:
     versions of these files, see `/scripts/generate_default_configs.py`.
     """
 
+    # Maximum delay before a saved state is written to disk, 0 to write it immediately.
+    state_save_delay_ms = 1000
+
     def __init__(self):
         self._last_saved = 0
         self.config = EuroPiScript._load_config_for_class(self.__class__)
@@ -205,11 +232,30 @@ class EuroPiScript:
         json_str = json.dumps(state)
         return self._save_state(json_str)
 
+    def save_state_packed(self, state: dict):
+        """Take state as a dict of the fields declared by ``state_fields()`` and save it as a binary
+        record. The fields missing from ``state`` keep their last saved values.
+        """
+        record = self._state_record
+        self._state_schema.pack_into(record, state)
+        return self._save_state(record)
+
+    @property
+    def _state_writer(self):
+        # Created on first use, as some scripts save state without calling super().__init__()
+        writer = getattr(self, "_writer", None)
+        if writer is None:
+            writer = self._writer = StateWriter(self._state_filename, self.state_save_delay_ms)
+        return writer
+
     def _save_state(self, state: str, mode: str = "w"):
-        with open(self._state_filename, mode) as file:
-            file.write(state)
+        self._state_writer.save(state)
         self._last_saved = ticks_ms()
 
+    def flush_state(self):
+        """Write the last saved state to disk now, instead of after ``state_save_delay_ms``."""
+        self._state_writer.flush()
+
     def load_state_str(self) -> str:
         """Check disk for saved state, if it exists, return the raw state value as a string.
 
@@ -234,11 +280,37 @@ class EuroPiScript:
         """
         return load_json_data(self._load_state())
 
+    def load_state_packed(self) -> dict:
+        """Load previously saved state as a dict of the fields declared by ``state_fields()``.
+
+        Check for a previously saved state. If it exists and was saved with the same fields, return
+        state as a dict. Otherwise, the default values of the fields are returned.
+        """
+        return self._state_schema.unpack(self._state_record)
+
+    @property
+    def _state_record(self):
+        # The record is updated in place by save_state_packed() and written by the state writer.
+        record = getattr(self, "_record", None)
+        if record is None:
+            record = self._record = self._state_schema.new_record(self._load_state(mode="rb"))
+        return record
+
+    @property
+    def _state_schema(self):
+        schema = getattr(self, "_schema", None)
+        if schema is None:
+            schema = self._schema = StateSchema(self.state_fields())
+        return schema
+
     def _load_state(self, mode: str = "r") -> any:
+        self.flush_state()
         return load_file(self._state_filename, mode)
 
     def remove_state(self):
         """Remove the state file for this script."""
+        self._state_writer.discard()
+        self._record = None
         delete_file(self._state_filename)
 
     def last_saved(self):
@@ -248,6 +320,12 @@ class EuroPiScript:
         except AttributeError:
             raise Exception("EuroPiScript classes must call `super().__init__()`.")
 
+    @classmethod
+    def state_fields(cls) -> "List[StateField]":
+        """Returns a list of StateFields describing the state saved by ``save_state_packed()``. By
+        default this function returns an empty list. Override it to save a packed state."""
+        return []
+
     # config methods
 
     @classmethod
@@ -258,4 +336,4 @@ class EuroPiScript:
 
     @staticmethod
     def _load_config_for_class(cls):
-        return ConfigFile.load_config(cls, ConfigSpec(cls.config_points()))
+        return ConfigFile.load_config(cls)
@@ -1,7 +1,12 @@
 """See menu.md for details."""
+import boot_trace
+
+boot_trace.mark("main")
+with boot_trace.phase("import europi"):
+    from europi import bootsplash, usb_connected, oled
 # from bootloader import BootloaderMenu
-from calibrate_input import CalibrateInput
-from europi import bootsplash, usb_connected, oled
+with boot_trace.phase("import calibrate_input"):
+    from calibrate_input import CalibrateInput
 # from calibrate import Calibrate
 
 # This is a fix for a USB connection issue documented in GitHub issue #179, and its removal condition is set out in
@@ -11,7 +16,8 @@ if usb_connected.value() == 0:
     sleep(0.5)
 
 # Reset the module state and display bootsplash screen.
-bootsplash()
+with boot_trace.phase("bootsplash"):
+    bootsplash()
 
 EUROPI_SCRIPT_CLASSES = [
     CalibrateInput
@@ -21,4 +27,6 @@ EUROPI_SCRIPT_CLASSES = [
 if __name__ == "__main__":
     oled.contrast(0)  # dim the display
     # BootloaderMenu(EUROPI_SCRIPT_CLASSES).main()
+    boot_trace.mark("script start")
+    boot_trace.dump()
     CalibrateInput().main()
@@ -0,0 +1,19 @@
+# Freezes the EuroPi core modules into the MicroPython firmware, so that they are neither compiled
+# nor loaded in RAM at import. Build the firmware with:
+#
+#   make BOARD=<board> FROZEN_MANIFEST=/path/to/software/rp2350/manifest.py
+#
+# and remove the frozen modules' .py/.mpy files from the module: the files in the filesystem root
+# are found before the frozen modules.
+# See https://docs.micropython.org/en/latest/reference/manifest.html
+
+include("$(BOARD_DIR)/manifest.py")
+
+require("ssd1306")
+
+module("europi.py")
+module("mcp4728.py")
+module("configuration.py")
+module("file_utils.py")
+module("config_store.py")
+module("persistence.py")
@@ -36,6 +36,11 @@ Ported to microPython by Alexander Olikevich (openfablab) with some changes:
 * Fixed incorrect register values types on initialisation 
 * Gains values read and write as 1 or 2
 * Rewrited Vref control for simplicity
+* Added set_values() to update the four channels in a single Fast Write transaction
+* Added a cached mode where channel properties are read from the driver's shadow registers
+* In cached mode, values equal to the current value are not sent again
+* Added sync_all() to write the four channels in a single Multi-Write transaction, and the option
+  to skip reading the registers at init
 
 """
 
@@ -44,22 +49,38 @@ from time import sleep
 
 _MCP4728_DEFAULT_ADDRESS = 0x60  # 0x61
 _MCP4728_CH_A_MULTI_EEPROM = 0x50
+_MCP4728_MAX_VALUE = 2 ** 12 - 1
 
 
 class MCP4728:
     """Helper library for the Microchip MCP4728 I2C 12-bit Quad DAC.
         :param i2c_bus: The I2C bus the MCP4728 is connected to.
         :param address: The I2C slave address of the sensor
+        :param cached: If True, the channel properties are read from the driver's shadow registers,
+            which are read from the device at init and updated on every write, instead of reading
+            the device at every call. Use refresh() to read the device again. In cached mode, a
+            value equal to the channel's current value is not sent to the device; the number of
+            writes issued and suppressed is counted in each channel's ``writes`` and
+            ``suppressed_writes`` attributes.
+        :param read_registers: If False, the registers are not read from the device at init and
+            the channels start at value 0, Vref VDD, gain 1 and normal power mode. The caller must
+            then call ``sync_all()`` to set the device in the same state.
     """
 
-    def __init__(self, i2c_bus, address=_MCP4728_DEFAULT_ADDRESS):
+    def __init__(self, i2c_bus, address=_MCP4728_DEFAULT_ADDRESS, cached=False, read_registers=True):
         self.i2c_device = i2c_bus
         self.address = address
-        raw_registers = self._read_registers()
+        self.cached = cached
+        if read_registers:
+            raw_registers = self._read_registers()
+        else:
+            raw_registers = [(0, 0, 1, 0)] * 4
         self.a = Channel(self, self._cache_page(*raw_registers[0]), 0)
         self.b = Channel(self, self._cache_page(*raw_registers[1]), 1)
         self.c = Channel(self, self._cache_page(*raw_registers[2]), 2)
         self.d = Channel(self, self._cache_page(*raw_registers[3]), 3)
+        self._channels = (self.a, self.b, self.c, self.d)
+        self._fast_write_buffer = bytearray(8)
 
     @staticmethod
     def _get_flags(high_byte):
@@ -88,6 +109,14 @@ class MCP4728:
             current_values.append((int(value), int(vref), int(gain) + 1, int(power_state)))
         return current_values
 
+    def refresh(self):
+        """Reads the output registers of the device and updates the driver's shadow registers"""
+        for channel, (value, vref, gain, pdm) in zip(self._channels, self._read_registers()):
+            channel._value = value
+            channel._vref = vref
+            channel._gain = gain
+            channel._pdm = pdm
+
     def save_settings(self):
         """Saves the currently selected values, Vref, and gain selections for each channel
            to the EEPROM, setting them as defaults on power up"""
@@ -139,6 +168,17 @@ class MCP4728:
         output_buffer = bytearray([pdm_setter_command_1, pdm_setter_command_2])
         self.i2c_device.writeto(self.address, output_buffer)
 
+    def sync_all(self):
+        """Syncs the driver's value, vref and gain state of the four channels with the DAC in a
+        single Multi-Write transaction. The outputs are updated immediately and the power down bits
+        are set to 0 (normal mode)."""
+        output_buffer = bytearray()
+        for channel in self._channels:
+            output_buffer.append(0b01000000 | channel.channel_index << 1)  # 0 1 0 0 0 DAC1 DAC0 UDAC
+            output_buffer.extend(self._generate_bytes_with_flags(channel))
+            channel._pdm = 0
+        self.i2c_device.writeto(self.address, output_buffer)
+
     def _set_value(self, channel):
         channel_bytes = self._generate_bytes_with_flags(channel)
         write_command_byte = 0b01000000  # 0 1 0 0 0 DAC1 DAC0 UDAC
@@ -146,6 +186,48 @@ class MCP4728:
         output_buffer = bytearray([write_command_byte])
         output_buffer.extend(channel_bytes)
         self.i2c_device.writeto(self.address, output_buffer)
+        # the Multi-Write command also writes the power down bits, which are left at 0 (normal mode)
+        channel._pdm = 0
+
+    def set_values(self, values):
+        """Sets the 12-bit value of the four channels in a single Fast Write transaction.
+
+        The Fast Write command sends 2 bytes per channel (power down bits and value) instead of the
+        3 bytes plus command byte per channel of a Multi-Write, and keeps the current Vref and gain
+        selections. If the LDAC pin is held high during the transaction, the four outputs are
+        updated at the same instant when LDAC is pulled low.
+
+        :param values: a sequence of four values for channels a, b, c and d. A value of None keeps
+            the channel's current value, which is read from the device first if not cached.
+        """
+        for value in values:
+            if value is not None and (value < 0 or value > _MCP4728_MAX_VALUE):
+                raise AttributeError(
+                    "`raw_value` must be a 12-bit integer between 0 and %s" % _MCP4728_MAX_VALUE
+                )
+        changed = not self.cached
+        if not self.cached and None in values:
+            # the values written back for the None entries must be the current ones
+            self.refresh()
+        for channel, value in zip(self._channels, values):
+            if value is None:
+                continue
+            if self.cached and value == channel._value:
+                channel.suppressed_writes += 1
+            else:
+                channel._value = value
+                channel.writes += 1
+                changed = True
+        if changed:
+            self._fast_write()
+
+    def _fast_write(self):
+        buf = self._fast_write_buffer
+        for channel in self._channels:
+            index = channel.channel_index << 1
+            buf[index] = channel._pdm << 4 | channel._value >> 8  # 0 0 PD1 PD0 D11 D10 D9 D8
+            buf[index + 1] = channel._value & 0xFF
+        self.i2c_device.writeto(self.address, buf)
 
     @staticmethod
     def _generate_bytes_with_flags(channel):
@@ -173,6 +255,8 @@ class Channel:
         self._pdm = cache_page["pdm"]
         self._dac = dac_instance
         self.channel_index = index
+        self.writes = 0
+        self.suppressed_writes = 0
 
     @property
     def normalized_value(self):
@@ -189,7 +273,8 @@ class Channel:
     @property
     def value(self):
         """The 12-bit current value for the channel."""
-        self._value = self._dac._read_registers()[self.channel_index][0]
+        if not self._dac.cached:
+            self._value = self._dac._read_registers()[self.channel_index][0]
         return self._value
 
     @value.setter
@@ -198,7 +283,12 @@ class Channel:
             raise AttributeError(
                 "`raw_value` must be a 12-bit integer between 0 and %s" % (2 ** 12 - 1)
             )
+        # a Multi-Write also brings the channel out of power down, so it is only redundant in normal mode
+        if self._dac.cached and value == self._value and self._pdm == 0:
+            self.suppressed_writes += 1
+            return
         self._value = value
+        self.writes += 1
         self._dac._set_value(self)  # pylint:disable=protected-access
 
     @property
@@ -208,7 +298,8 @@ class Channel:
 
         With gain set to 1, the output voltage goes from 0v to 2.048V. If a channe's gain is set
         to 2, the voltage goes from 0v to 4.096V. `gain` Must be 1 or 2"""
-        self._gain = self._dac._read_registers()[self.channel_index][2]
+        if not self._dac.cached:
+            self._gain = self._dac._read_registers()[self.channel_index][2]
         return self._gain
 
     @gain.setter
@@ -221,7 +312,8 @@ class Channel:
     @property
     def vref(self):
         """Sets the DAC's voltage reference source. Must be 0 (VDD) or 1 (Internal 2.048V)"""
-        self._vref = self._dac._read_registers()[self.channel_index][1]
+        if not self._dac.cached:
+            self._vref = self._dac._read_registers()[self.channel_index][1]
         return self._vref
 
     @vref.setter
@@ -236,7 +328,8 @@ class Channel:
         """Sets the DAC's power down mode. 0 for normal operation, or
             other to turn off most of the channel circuits and connect VOUT to GND by 
             resistor (1: 1 kΩ, 2: 100 kΩ, 3: 500 kΩ)."""
-        self._pdm = self._dac._read_registers()[self.channel_index][3]
+        if not self._dac.cached:
+            self._pdm = self._dac._read_registers()[self.channel_index][3]
         return self._pdm
 
     @pdm.setter
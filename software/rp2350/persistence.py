@@ -0,0 +1,191 @@
+"""Writes the scripts' saved state to the flash, coalescing the writes.
+
+Writing a file stalls the script for milliseconds and wears the flash, so a ``StateWriter`` does
+not write the file at every save: the last state saved is written ``delay_ms`` after the first of
+the saves made since the last write, and a state equal to the content of the file is not written
+at all. The file is written to a temporary file which is then renamed over the previous one, so a
+power loss during a write keeps the previous state.
+
+The pending states are written by ``flush()``, or by ``flush_all()`` for all the writers, which
+``europi.reset_state()`` and ``europi.reset_module()`` call before another script starts or the
+module is reset: scripts reset the module with ``reset_module()`` rather than ``machine.reset()``.
+
+A ``StateSchema`` packs a state dict in a fixed-size binary record with ``struct``, according to a
+list of ``StateField``. The record starts with a 32-bit id of the schema, so a record saved with
+another schema is ignored instead of being decoded with the wrong layout. Each field has a fixed
+offset in the record, so a field is updated in place without packing the other fields.
+"""
+import os
+import struct
+
+from binascii import crc32
+from machine import Timer
+
+from file_utils import load_file
+
+DEFAULT_SAVE_DELAY_MS = 1000
+
+# writers with a pending state, flushed by flush_all()
+_pending_writers = []
+
+
+def write_file_atomic(filename, data):
+    """Write ``data`` (bytes) to a temporary file and rename it to ``filename``."""
+    temp = filename + ".tmp"
+    with open(temp, "wb") as file:
+        file.write(data)
+    os.rename(temp, filename)
+
+
+class StateWriter:
+    """Coalesces the writes of a state file.
+
+    :param filename: the file written
+    :param delay_ms: the maximum time a saved state waits before being written, 0 to write it
+        immediately
+    """
+
+    def __init__(self, filename, delay_ms=DEFAULT_SAVE_DELAY_MS):
+        self.filename = filename
+        self.delay_ms = delay_ms
+        self.writes = 0
+        self.skipped_writes = 0
+        self._pending = None
+        self._written = None  # content of the file, read on the first save
+        self._timer = None
+
+    def save(self, data):
+        """Save the state, as a str, bytes or bytearray. It is written within ``delay_ms``."""
+        if isinstance(data, str):
+            data = data.encode()
+        if self._written is None:
+            self._written = load_file(self.filename, "rb")
+        self._pending = data
+        if not self.delay_ms:
+            self.flush()
+        elif self not in _pending_writers:
+            _pending_writers.append(self)
+            if self._timer is None:
+                self._timer = Timer()
+            self._timer.init(mode=Timer.ONE_SHOT, period=self.delay_ms, callback=self._on_timer)
+
+    def _on_timer(self, timer):
+        self.flush()
+
+    def pending(self):
+        """Return the state waiting to be written, or None."""
+        return self._pending
+
+    def flush(self):
+        """Write the pending state now, if it differs from the content of the file."""
+        data = self._pending
+        if data is None:
+            return
+        self._pending = None
+        if self in _pending_writers:
+            _pending_writers.remove(self)
+            self._timer.deinit()
+        if data == self._written:
+            self.skipped_writes += 1
+            return
+        write_file_atomic(self.filename, data)
+        # a copy, as a record can be updated in place after being saved
+        self._written = bytes(data)
+        self.writes += 1
+
+    def discard(self):
+        """Drop the pending state, and forget the content of the file (for example when it is
+        deleted)."""
+        self._pending = None
+        self._written = None
+        if self in _pending_writers:
+            _pending_writers.remove(self)
+            self._timer.deinit()
+
+
+def flush_all():
+    """Write the pending states of all the writers."""
+    for writer in list(_pending_writers):
+        writer.flush()
+
+
+_RECORD_HEADER = "<I"
+_RECORD_HEADER_SIZE = struct.calcsize(_RECORD_HEADER)
+_FIELD_FORMATS = "bBhHiIqQfd"
+
+
+class StateField:
+    """A field of a packed state.
+
+    :param name: The key of the field in the state dict
+    :param format: The ``struct`` format of the values, one of ``bBhHiIqQfd``
+    :param default: The default value, or the list of the default values if ``length`` is given
+    :param length: The number of values of a list field, or None for a single value
+    """
+
+    def __init__(self, name: str, format: str, default, length: int = None):
+        if len(format) != 1 or format not in _FIELD_FORMATS:
+            raise ValueError(f"format of field {name} must be one of {_FIELD_FORMATS}")
+        if length is not None and len(default) != length:
+            raise ValueError(f"default value of field {name} must have {length} values")
+        self.name = name
+        self.format = f"<{length or 1}{format}"
+        self.default = default
+        self.length = length
+        self.size = struct.calcsize(self.format)
+        self.offset = 0  # set by the StateSchema
+
+
+class StateSchema:
+    """The layout of a packed state: the fields in the order given, after the id of the schema.
+
+    :param fields: The list of the ``StateField`` of the state
+    """
+
+    def __init__(self, fields: "List[StateField]"):
+        self.fields = {}
+        offset = _RECORD_HEADER_SIZE
+        for field in fields:
+            if field.name in self.fields:
+                raise ValueError(f"state field {field.name} is already defined")
+            field.offset = offset
+            offset += field.size
+            self.fields[field.name] = field
+        self.size = offset
+        self.schema_id = crc32(
+            " ".join(f"{field.name}:{field.format}" for field in self.fields.values()).encode()
+        )
+
+    def default_state(self) -> dict:
+        """Returns the default state for this schema."""
+        return {name: field.default for name, field in self.fields.items()}
+
+    def new_record(self, data=b"") -> bytearray:
+        """Returns a record holding ``data`` if it is a record of this schema, else the default
+        state."""
+        if len(data) == self.size and struct.unpack_from(_RECORD_HEADER, data)[0] == self.schema_id:
+            return bytearray(data)
+        record = bytearray(self.size)
+        struct.pack_into(_RECORD_HEADER, record, 0, self.schema_id)
+        self.pack_into(record, self.default_state())
+        return record
+
+    def pack_into(self, record: bytearray, state: dict):
+        """Pack the fields of ``state`` at their offsets in ``record``. The fields missing from
+        ``state`` are left unchanged."""
+        for name, value in state.items():
+            field = self.fields.get(name)
+            if field is None:
+                raise ValueError(f"state field {name} is not defined")
+            if field.length is None:
+                struct.pack_into(field.format, record, field.offset, value)
+            else:
+                struct.pack_into(field.format, record, field.offset, *value)
+
+    def unpack(self, record) -> dict:
+        """Returns the state packed in ``record``, with lists for the list fields."""
+        state = {}
+        for name, field in self.fields.items():
+            values = struct.unpack_from(field.format, record, field.offset)
+            state[name] = values[0] if field.length is None else list(values)
+        return state
@@ -0,0 +1,69 @@
+"""A host-side simulator of the EuroPi hardware, to run and profile the firmware on a computer.
+
+``install()`` registers fake ``machine``, ``framebuf``, ``ssd1306``, ``utime`` and ``micropython``
+modules, backed by a simulated module: an emulated MCP4728 DAC and SSD1306 OLED which decode the
+bytes written by the drivers, and scriptable inputs. It must be called before importing
+``europi``::
+
+    import simulator
+
+    hardware = simulator.install()
+    from europi import ain, cv3, oled
+
+    hardware.set_input("ain", 2.5)
+    cv3.voltage(ain.read_voltage())
+    print(hardware.output_voltage(3))
+    print("\\n".join(hardware.screen()))
+
+See ``simulator.hardware.Hardware`` for the inputs and outputs of the simulated module.
+
+A script can also be run from the firmware's directory with ``python -m simulator <script>``.
+"""
+import gc
+import importlib
+import os
+import sys
+import time
+
+from simulator.hardware import Hardware
+
+# heap size reported by gc.mem_free() and gc.mem_alloc()
+HEAP_SIZE = 512 * 1024
+
+hardware = Hardware()
+
+
+class Reset(SystemExit):
+    """Raised by ``machine.reset()``."""
+
+
+def _mem_alloc():
+    import tracemalloc
+
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+
+def install(threaded_timers=True):
+    """Install the fake MicroPython modules and return the simulated hardware.
+
+    The timer callbacks are called from background threads, or only by
+    ``hardware.run_timers()`` if ``threaded_timers`` is False, for deterministic tests.
+    ``gc.mem_alloc()`` reports the memory traced by ``tracemalloc`` when it is started.
+    """
+    hardware.threaded_timers = threaded_timers
+    # in dependency order: ssd1306 imports framebuf and micropython
+    for name in ("micropython", "utime", "framebuf", "machine", "ssd1306"):
+        sys.modules[name] = importlib.import_module(f"simulator.{name}")
+    utime = sys.modules["utime"]
+    for name in ("ticks_ms", "ticks_us", "ticks_cpu", "ticks_add", "ticks_diff", "sleep_ms", "sleep_us"):
+        setattr(time, name, getattr(utime, name))
+    if not hasattr(gc, "mem_free"):
+        gc.mem_alloc = _mem_alloc
+        gc.mem_free = lambda: HEAP_SIZE - _mem_alloc()
+
+    # The firmware is in the parent directory, and the device also imports from /lib.
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for path in (os.path.join(root, "lib"), root):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    return hardware
@@ -0,0 +1,52 @@
+"""Run a EuroPi script in the simulator.
+
+    python -m simulator [--seconds N] [--set INPUT=VALUE ...] [--show] SCRIPT
+
+SCRIPT is a module name such as ``cv_generator``, run as ``__main__`` like on the device. The
+inputs can be set before the script starts, for example ``--set ain=2.5 --set k1=0.5 --set b1=1``.
+With ``--seconds`` the script is stopped after that time, and ``--show`` then prints the display.
+"""
+import argparse
+import runpy
+import signal
+
+import simulator
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _timeout(signum, frame):
+    raise _Timeout()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m simulator", description="Run a EuroPi script in the simulator.")
+    parser.add_argument("script", help="the module to run, for example cv_generator")
+    parser.add_argument("--seconds", type=float, default=0, help="stop the script after this time")
+    parser.add_argument("--set", action="append", default=[], metavar="INPUT=VALUE", help="set an input")
+    parser.add_argument("--show", action="store_true", help="print the display when the script stops")
+    args = parser.parse_args()
+
+    hardware = simulator.install()
+    for setting in args.set:
+        name, _, value = setting.partition("=")
+        hardware.set_input(name, float(value))
+
+    if args.seconds:
+        signal.signal(signal.SIGALRM, _timeout)
+        signal.setitimer(signal.ITIMER_REAL, args.seconds)
+    try:
+        runpy.run_module(args.script, run_name="__main__", alter_sys=True)
+    except (_Timeout, KeyboardInterrupt):
+        pass
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        if args.show:
+            print("\n".join(hardware.screen()))
+        print("outputs: " + " ".join(f"cv{n}={hardware.output_voltage(n):.3f}V" for n in range(1, 7)))
+
+
+if __name__ == "__main__":
+    main()
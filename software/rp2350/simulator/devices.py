@@ -0,0 +1,271 @@
+"""Emulated I2C devices: they decode the bytes written by the drivers, as the real chips do."""
+
+# Number of argument bytes following each SSD1306 command that takes arguments.
+_SSD1306_ARGUMENTS = {
+    0x20: 1,  # memory addressing mode
+    0x21: 2,  # column address
+    0x22: 2,  # page address
+    0x81: 1,  # contrast
+    0x8D: 1,  # charge pump
+    0xA8: 1,  # multiplex ratio
+    0xAD: 1,  # internal IREF
+    0xD3: 1,  # display offset
+    0xD5: 1,  # clock divide
+    0xD9: 1,  # pre-charge
+    0xDA: 1,  # COM pins
+    0xDB: 1,  # VCOMH deselect level
+}
+
+
+class I2CDevice:
+    """Base class of the emulated devices. ``write()`` receives the bytes of each write
+    transaction and ``read()`` returns the bytes of a read transaction."""
+
+    def write(self, data):
+        pass
+
+    def read(self, n):
+        return bytes(n)
+
+
+class MCP4728Device(I2CDevice):
+    """An MCP4728 quad DAC.
+
+    It decodes the Fast Write, Multi-Write, Sequential Write, Single Write, Write Vref, Write Gain
+    and Write Power-Down commands, and returns the input registers and EEPROM on a read. The input
+    registers are copied to the outputs when LDAC is low, or by a Multi-Write with UDAC cleared.
+
+    ``channels`` holds the state of each channel [A..D] as a dict with the ``value``, ``vref``,
+    ``gain`` and ``pdm`` of the input register, the ``output`` code and the ``eeprom`` settings.
+    ``commands`` counts the decoded commands by name.
+    """
+
+    def __init__(self, ldac):
+        self.ldac = ldac
+        self.channels = [
+            {
+                "value": 0,
+                "vref": 0,
+                "gain": 1,
+                "pdm": 0,
+                "output": 0,
+                "eeprom": {"value": 0, "vref": 0, "gain": 1, "pdm": 0},
+            }
+            for _ in range(4)
+        ]
+        self.commands = {}
+
+    def _count(self, name):
+        self.commands[name] = self.commands.get(name, 0) + 1
+
+    def _update(self, channels=range(4)):
+        for i in channels:
+            self.channels[i]["output"] = self.channels[i]["value"]
+
+    def latch(self):
+        """Called when LDAC goes low: the outputs take the values of the input registers."""
+        self._update()
+
+    def _set_input(self, i, high, low):
+        # Fast Write: 0 0 PD1 PD0 D11 D10 D9 D8, D7..D0
+        channel = self.channels[i]
+        channel["pdm"] = (high >> 4) & 0b11
+        channel["value"] = (high & 0x0F) << 8 | low
+
+    def write(self, data):
+        if not data:
+            return
+        command = data[0]
+        if command >> 6 == 0b00:
+            self._count("fast_write")
+            i = 0
+            for n in range(0, len(data) - 1, 2):
+                self._set_input(i, data[n], data[n + 1])
+                i = (i + 1) % 4
+        elif command >> 3 == 0b01000:
+            self._count("multi_write")
+            for n in range(0, len(data) - 2, 3):
+                i = (data[n] >> 1) & 0b11
+                self._write_register(i, data[n + 1], data[n + 2])
+                if not data[n] & 1:
+                    self._update((i,))
+        elif command >> 3 == 0b01010:
+            self._count("sequential_write")
+            i = (command >> 1) & 0b11
+            for n in range(1, len(data) - 1, 2):
+                if i > 3:
+                    break
+                self._write_register(i, data[n], data[n + 1], eeprom=True)
+                i += 1
+            if not command & 1:
+                self._update()
+        elif command >> 3 == 0b01011:
+            self._count("single_write")
+            i = (command >> 1) & 0b11
+            self._write_register(i, data[1], data[2], eeprom=True)
+            if not command & 1:
+                self._update((i,))
+        elif command >> 5 == 0b100:
+            self._count("write_vref")
+            for i in range(4):
+                self.channels[i]["vref"] = (command >> (3 - i)) & 1
+        elif command >> 5 == 0b110:
+            self._count("write_gain")
+            for i in range(4):
+                self.channels[i]["gain"] = ((command >> (3 - i)) & 1) + 1
+        elif command >> 5 == 0b101:
+            self._count("write_power_down")
+            pd = (command & 0x0F) << 8 | (data[1] if len(data) > 1 else 0)
+            for i in range(4):
+                self.channels[i]["pdm"] = (pd >> (10 - 2 * i)) & 0b11
+        else:
+            self._count("unknown")
+        if not self.ldac.value:
+            self._update()
+
+    def _write_register(self, i, high, low, eeprom=False):
+        channel = self.channels[i]
+        channel["vref"] = high >> 7
+        channel["pdm"] = (high >> 5) & 0b11
+        channel["gain"] = ((high >> 4) & 1) + 1
+        channel["value"] = (high & 0x0F) << 8 | low
+        if eeprom:
+            channel["eeprom"] = {
+                "value": channel["value"],
+                "vref": channel["vref"],
+                "gain": channel["gain"],
+                "pdm": channel["pdm"],
+            }
+
+    def read(self, n):
+        self._count("read")
+        data = bytearray()
+        for i, channel in enumerate(self.channels):
+            for registers in (channel, channel["eeprom"]):
+                # RDY/BSY POR DAC1 DAC0 0 A2 A1 A0, then the register or EEPROM data
+                data.append(0b11000000 | i << 4)
+                data.append(
+                    registers["vref"] << 7
+                    | registers["pdm"] << 5
+                    | (registers["gain"] - 1) << 4
+                    | registers["value"] >> 8
+                )
+                data.append(registers["value"] & 0xFF)
+        return bytes(data[:n]) + bytes(max(0, n - len(data)))
+
+
+class SSD1306Device(I2CDevice):
+    """An SSD1306 OLED controller.
+
+    It decodes the commands and data sent through the control bytes 0x80 (single command), 0x00
+    (command stream) and 0x40 (data stream), and writes the data in its GDDRAM according to the
+    addressing mode and to the column and page windows, like the real controller.
+
+    ``gddram`` is the 128x64 display RAM, 8 pages of 128 bytes with one bit per row.
+    ``data_bytes`` counts the bytes written to the GDDRAM.
+    """
+
+    def __init__(self, width=128, height=32):
+        self.width = width
+        self.height = height
+        self.gddram = bytearray(128 * 8)
+        self.on = False
+        self.contrast = 0x7F
+        self.inverted = False
+        self.addressing = 0b10  # page addressing at reset
+        self.col_start, self.col_end = 0, 127
+        self.page_start, self.page_end = 0, 7
+        self.col = 0
+        self.page = 0
+        self.data_bytes = 0
+        self.commands = 0
+        self._command = None
+        self._arguments = []
+
+    def write(self, data):
+        if not data:
+            return
+        control = data[0]
+        if control & 0x40:
+            self._data(data[1:])
+        elif control & 0x80:
+            self._command_byte(data[1])
+        else:
+            for byte in data[1:]:
+                self._command_byte(byte)
+
+    def _command_byte(self, byte):
+        if self._command is None:
+            self.commands += 1
+            if byte in _SSD1306_ARGUMENTS:
+                self._command = byte
+                self._arguments = []
+                return
+            self._execute(byte, [])
+            return
+        self._arguments.append(byte)
+        if len(self._arguments) == _SSD1306_ARGUMENTS[self._command]:
+            command, self._command = self._command, None
+            self._execute(command, self._arguments)
+
+    def _execute(self, command, arguments):
+        if command == 0x20:
+            self.addressing = arguments[0] & 0b11
+        elif command == 0x21:
+            self.col_start, self.col_end = arguments[0] & 0x7F, arguments[1] & 0x7F
+            self.col = self.col_start
+        elif command == 0x22:
+            self.page_start, self.page_end = arguments[0] & 0x07, arguments[1] & 0x07
+            self.page = self.page_start
+        elif command == 0x81:
+            self.contrast = arguments[0]
+        elif command in (0xA6, 0xA7):
+            self.inverted = command == 0xA7
+        elif command in (0xAE, 0xAF):
+            self.on = command == 0xAF
+        elif 0xB0 <= command <= 0xB7:
+            self.page = command & 0x07
+        elif command <= 0x0F:
+            self.col = (self.col & 0xF0) | command
+        elif command <= 0x1F:
+            self.col = (self.col & 0x0F) | (command & 0x0F) << 4
+
+    def _data(self, data):
+        self.data_bytes += len(data)
+        for byte in data:
+            self.gddram[self.page * 128 + self.col] = byte
+            if self.addressing == 0b00:
+                # horizontal: next column, then next page at the end of the window
+                if self.col >= self.col_end:
+                    self.col = self.col_start
+                    self.page = self.page_start if self.page >= self.page_end else self.page + 1
+                else:
+                    self.col += 1
+            elif self.addressing == 0b01:
+                # vertical: next page, then next column at the end of the window
+                if self.page >= self.page_end:
+                    self.page = self.page_start
+                    self.col = self.col_start if self.col >= self.col_end else self.col + 1
+                else:
+                    self.page += 1
+            else:
+                # page: the column wraps within the page
+                self.col = (self.col + 1) & 0x7F
+
+    def frame(self):
+        """Return the visible part of the GDDRAM, in the MONO_VLSB layout of the display's
+        frame buffer."""
+        data = bytearray()
+        for page in range(self.height // 8):
+            data += self.gddram[page * 128 : page * 128 + self.width]
+        return bytes(data)
+
+    def pixel(self, x, y):
+        return (self.gddram[(y // 8) * 128 + x] >> (y % 8)) & 1
+
+    def render(self, on="#", off="."):
+        """Return the visible part of the GDDRAM as text, one string per row."""
+        return [
+            "".join(on if self.pixel(x, y) else off for x in range(self.width))
+            for y in range(self.height)
+        ]
@@ -0,0 +1,174 @@
+"""A pure Python ``framebuf`` module, with the monochrome formats used by the firmware.
+
+The MicroPython 8x8 font is not included: ``text()`` draws a placeholder glyph for each character,
+covering the same cells as the real font and derived from the character code, so that different
+strings produce different frames.
+"""
+MONO_VLSB = 0
+RGB565 = 1
+GS4_HMSB = 2
+MONO_HLSB = 3
+MONO_HMSB = 4
+GS2_HMSB = 5
+GS8 = 6
+MVLSB = MONO_VLSB
+
+
+def _glyph_column(code, column):
+    # 7 rows of pixels for the columns 0 to 5 of the 8x8 cell, nothing for the space
+    if code == 32 or column > 5:
+        return 0
+    return ((code * (column + 3) * 0x9E) >> 2 | 0x41) & 0x7F
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format, stride=None):
+        if format not in (MONO_VLSB, MONO_HLSB, MONO_HMSB):
+            raise ValueError("invalid format")
+        self._buf = buffer
+        self._width = width
+        self._height = height
+        self._format = format
+        self._stride = width if stride is None else stride
+        if format != MONO_VLSB:
+            self._stride = (self._stride + 7) & ~7
+
+    def _index(self, x, y):
+        if self._format == MONO_VLSB:
+            return (y >> 3) * self._stride + x, y & 7
+        index = (y * self._stride + x) >> 3
+        if self._format == MONO_HLSB:
+            return index, 7 - (x & 7)
+        return index, x & 7
+
+    def _get(self, x, y):
+        index, bit = self._index(x, y)
+        return (self._buf[index] >> bit) & 1
+
+    def _set(self, x, y, c):
+        if 0 <= x < self._width and 0 <= y < self._height:
+            index, bit = self._index(x, y)
+            if c:
+                self._buf[index] |= 1 << bit
+            else:
+                self._buf[index] &= ~(1 << bit) & 0xFF
+
+    def fill(self, c):
+        value = 0xFF if c else 0
+        for i in range(len(self._buf)):
+            self._buf[i] = value
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self._width and 0 <= y < self._height):
+            return None
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    def fill_rect(self, x, y, w, h, c):
+        for yy in range(max(y, 0), min(y + h, self._height)):
+            for xx in range(max(x, 0), min(x + w, self._width)):
+                self._set(xx, yy, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        dx = abs(x2 - x1)
+        dy = -abs(y2 - y1)
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
+        error = dx + dy
+        while True:
+            self._set(x1, y1, c)
+            if x1 == x2 and y1 == y2:
+                return
+            e2 = 2 * error
+            if e2 >= dy:
+                error += dy
+                x1 += sx
+            if e2 <= dx:
+                error += dx
+                y1 += sy
+
+    def ellipse(self, x, y, xr, yr, c, f=False, m=0b1111):
+        # m selects the quadrants: bit 0 is top right, then counter-clockwise
+        def plot(dx, dy):
+            for quadrant, sx, sy in ((1, 1, -1), (2, -1, -1), (4, -1, 1), (8, 1, 1)):
+                if m & quadrant:
+                    if f:
+                        self.fill_rect(min(x, x + sx * dx), y + sy * dy, dx + 1, 1, c)
+                    else:
+                        self._set(x + sx * dx, y + sy * dy, c)
+
+        def width(dy):
+            return int(round(xr * (1 - (dy / yr) ** 2) ** 0.5)) if yr else xr
+
+        for dy in range(yr + 1):
+            dx = width(dy)
+            if f:
+                plot(dx, dy)
+            else:
+                # join the outline down to the width of the next row
+                for ddx in range(width(dy + 1) if dy < yr else 0, dx + 1):
+                    plot(ddx, dy)
+
+    def poly(self, x, y, coords, c, f=False):
+        points = [(x + coords[i], y + coords[i + 1]) for i in range(0, len(coords) - 1, 2)]
+        if not points:
+            return
+        if f:
+            top = min(py for _, py in points)
+            bottom = max(py for _, py in points)
+            for row in range(top, bottom + 1):
+                crossings = []
+                for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+                    if (y1 <= row < y2) or (y2 <= row < y1):
+                        crossings.append(x1 + (row - y1) * (x2 - x1) / (y2 - y1))
+                crossings.sort()
+                for i in range(0, len(crossings) - 1, 2):
+                    start = int(round(crossings[i]))
+                    self.fill_rect(start, row, int(round(crossings[i + 1])) - start + 1, 1, c)
+        for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+            self.line(x1, y1, x2, y2, c)
+
+    def text(self, s, x, y, c=1):
+        for n, char in enumerate(str(s)):
+            code = ord(char)
+            for column in range(8):
+                bits = _glyph_column(code, column)
+                for row in range(8):
+                    if bits >> row & 1:
+                        self._set(x + n * 8 + column, y + row, c)
+
+    def scroll(self, xstep, ystep):
+        xs = range(self._width) if xstep <= 0 else range(self._width - 1, -1, -1)
+        ys = range(self._height) if ystep <= 0 else range(self._height - 1, -1, -1)
+        for yy in ys:
+            for xx in xs:
+                sx, sy = xx - xstep, yy - ystep
+                if 0 <= sx < self._width and 0 <= sy < self._height:
+                    self._set(xx, yy, self._get(sx, sy))
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if isinstance(fbuf, tuple):
+            fbuf = FrameBuffer(*fbuf)
+        for sy in range(fbuf._height):
+            for sx in range(fbuf._width):
+                c = fbuf._get(sx, sy)
+                if palette is not None:
+                    c = palette.pixel(c, 0)
+                if c != key:
+                    self._set(x + sx, y + sy, c)
@@ -0,0 +1,223 @@
+"""The simulated EuroPi: the state of the pins, ADC channels and I2C devices shared by the fake
+``machine`` module, and the methods used to drive the inputs and read the outputs."""
+import threading
+import time
+
+from simulator.devices import MCP4728Device, SSD1306Device
+
+# GPIO and ADC channels used by europi.py
+PIN_DIN = 22
+PIN_B1 = 4
+PIN_B2 = 5
+PIN_USB = 24
+PIN_LDAC = 13
+PIN_CV1 = 21
+PIN_CV2 = 20
+ADC_AIN = 0
+ADC_K1 = 1
+ADC_K2 = 2
+
+# I2C buses and addresses
+OLED_BUS = 0
+OLED_ADDRESS = 0x3C
+DAC_BUS = 1
+DAC_ADDRESS = 0x60
+
+# Analogue model of the module, consistent with default_calibration.py
+AIN_READING_PER_VOLT = 4700  # 16-bit ADC reading per volt at the analogue input
+PWM_DUTY_PER_VOLT = 6300  # 16-bit PWM duty cycle per volt at outputs 1 and 2
+DAC_VDD = 3.3  # MCP4728 reference voltage when Vref is VDD
+DAC_OUTPUT_GAIN = 3.2  # gain of the output stage of outputs 3 to 6
+DAC_INTERNAL_VREF = 2.048
+
+# EuroPi output [3..6] --> DAC channel [0..3], as in europi.DAC_CHANNEL
+DAC_CHANNEL = {3: 3, 4: 1, 5: 2, 6: 0}
+
+DIGITAL_INPUTS = {"din": PIN_DIN, "b1": PIN_B1, "b2": PIN_B2}
+ANALOGUE_INPUTS = {"ain": ADC_AIN, "k1": ADC_K1, "k2": ADC_K2}
+
+
+class PinState:
+    """The state of a GPIO, shared by all the ``machine.Pin`` objects created for it."""
+
+    def __init__(self, id, value=1):
+        self.id = id
+        self.value = value
+        self.handler = None
+        self.trigger = 0
+        self.duty = 0
+        self.listener = None
+
+    def set(self, value, irq_rising, irq_falling):
+        value = 1 if value else 0
+        previous = self.value
+        self.value = value
+        if previous == value:
+            return
+        if self.listener is not None:
+            self.listener(value)
+        if self.handler is None:
+            return
+        if (value and self.trigger & irq_rising) or (not value and self.trigger & irq_falling):
+            self.handler(self)
+
+
+class Hardware:
+    """The simulated module.
+
+    The analogue inputs (``"ain"``, ``"k1"`` and ``"k2"``) and the digital inputs (``"din"``,
+    ``"b1"`` and ``"b2"``) are driven with ``set_input()``. An analogue input is a voltage for
+    ``ain`` and a position between 0.0 (fully counter-clockwise) and 1.0 for the knobs. It can also
+    be a function of the time in seconds since the simulator was installed, to script a signal::
+
+        hardware.set_input("ain", lambda t: 5 + 5 * math.sin(2 * math.pi * t))
+
+    A digital input is 1 when the button is pressed or the gate is high. The simulated pins are
+    active low, like the real ones, and their IRQ handlers are called on each change.
+
+    ``output_voltage()`` returns the voltage of the outputs 1 to 6, and ``patch()`` connects an
+    output to the analogue input, as needed by the calibration and self-test scripts.
+    """
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.pins = {}
+        self.adc = {}
+        self.noise = 0
+        self._noise_state = 1
+        self.buses = {}
+        self.stats = {}
+        self.i2c_log = None
+        self.timers = []
+        self.irq_lock = threading.RLock()
+        self.threaded_timers = True
+        self.cpu_freq = 125_000_000
+        self.dac = MCP4728Device(self.pin(PIN_LDAC, 0))
+        self.pin(PIN_LDAC).listener = lambda value: value or self.dac.latch()
+        self.oled = SSD1306Device()
+        self.attach(DAC_BUS, DAC_ADDRESS, self.dac)
+        self.attach(OLED_BUS, OLED_ADDRESS, self.oled)
+        for name in DIGITAL_INPUTS:
+            self.set_input(name, 0)
+        self.set_input("ain", 0.0)
+        self.set_input("k1", 0.0)
+        self.set_input("k2", 0.0)
+        self.pin(PIN_USB, 1)
+
+    def now(self):
+        """Return the time in seconds since the simulator was created."""
+        return time.monotonic() - self.start
+
+    def pin(self, id, value=1):
+        """Return the state of a GPIO, creating it with the given value if needed."""
+        if id not in self.pins:
+            self.pins[id] = PinState(id, value)
+        return self.pins[id]
+
+    def attach(self, bus, address, device):
+        """Connect an emulated device to an I2C bus."""
+        self.buses.setdefault(bus, {})[address] = device
+
+    def i2c_devices(self, bus):
+        """Return the devices connected to an I2C bus, by address."""
+        return self.buses.setdefault(bus, {})
+
+    def i2c_stats(self, bus):
+        """Return the number of transactions and bytes transferred on an I2C bus."""
+        return self.stats.setdefault(bus, {"transactions": 0, "bytes": 0, "freq": 400_000})
+
+    def i2c_time_us(self, bus):
+        """Return an estimate of the time spent on an I2C bus, in microseconds: 9 clock cycles per
+        byte plus the start, address and stop of each transaction."""
+        stats = self.i2c_stats(bus)
+        cycles = 9 * stats["bytes"] + 11 * stats["transactions"]
+        return cycles * 1_000_000 / stats["freq"]
+
+    def reset_stats(self):
+        """Clear the I2C statistics and the devices' command counters."""
+        for stats in self.stats.values():
+            stats["transactions"] = stats["bytes"] = 0
+        self.dac.commands = {}
+        self.oled.commands = self.oled.data_bytes = 0
+
+    # Inputs
+
+    def set_input(self, name, value):
+        """Set the value of an input, or a function of the time returning it."""
+        if name in ANALOGUE_INPUTS:
+            self.adc[ANALOGUE_INPUTS[name]] = (name, value)
+        elif name in DIGITAL_INPUTS:
+            from simulator.machine import Pin
+
+            with self.irq_lock:
+                self.pin(DIGITAL_INPUTS[name]).set(not value, Pin.IRQ_RISING, Pin.IRQ_FALLING)
+        else:
+            raise ValueError(f"Unknown input '{name}', expected one of ain, k1, k2, din, b1 or b2")
+
+    def press(self, name):
+        """Press a button (or raise the digital input)."""
+        self.set_input(name, 1)
+
+    def release(self, name):
+        """Release a button (or lower the digital input)."""
+        self.set_input(name, 0)
+
+    def patch(self, output, input="ain"):
+        """Connect an output [1..6] to the analogue input, or disconnect it with ``output=None``."""
+        if output is None:
+            self.set_input(input, 0.0)
+        else:
+            self.set_input(input, lambda t: self.output_voltage(output))
+
+    def set_noise(self, amplitude):
+        """Add a pseudo-random noise of +/- ``amplitude`` to the 16-bit ADC readings."""
+        self.noise = amplitude
+
+    def read_adc(self, channel):
+        """Return the 16-bit reading of an ADC channel, like ``machine.ADC.read_u16()``."""
+        if channel not in self.adc:
+            return 0
+        name, value = self.adc[channel]
+        if callable(value):
+            value = value(self.now())
+        if name == "ain":
+            reading = value * AIN_READING_PER_VOLT
+        else:
+            # The knobs are wired so that the reading decreases when turning clockwise.
+            reading = (1.0 - value) * 65535
+        if self.noise:
+            # xorshift, so that the noise does not depend on the random module's state
+            x = self._noise_state
+            x ^= (x << 13) & 0xFFFFFFFF
+            x ^= x >> 17
+            x ^= (x << 5) & 0xFFFFFFFF
+            self._noise_state = x
+            reading += (x % (2 * self.noise + 1)) - self.noise
+        # 12-bit conversion, left-justified in 16 bits like the RP2350 port does.
+        code = min(max(int(round(reading)) >> 4, 0), 4095)
+        return code << 4 | code >> 8
+
+    # Outputs
+
+    def output_voltage(self, output):
+        """Return the voltage of an output [1..6]."""
+        if output == 1:
+            return self.pin(PIN_CV1).duty / PWM_DUTY_PER_VOLT
+        if output == 2:
+            return self.pin(PIN_CV2).duty / PWM_DUTY_PER_VOLT
+        channel = self.dac.channels[DAC_CHANNEL[output]]
+        vref = DAC_INTERNAL_VREF * channel["gain"] if channel["vref"] else DAC_VDD
+        if channel["pdm"]:
+            return 0.0
+        return channel["output"] / 4096 * vref * DAC_OUTPUT_GAIN
+
+    def screen(self):
+        """Return the OLED content as a list of strings, one per row."""
+        return self.oled.render()
+
+    # Timers
+
+    def run_timers(self):
+        """Call the callbacks of the timers that are due, when the timers are not threaded."""
+        for timer in list(self.timers):
+            timer._run_due()
@@ -0,0 +1,253 @@
+"""A fake ``machine`` module, backed by the simulated hardware in ``simulator.hardware``.
+
+Only the parts of the API used by the firmware are provided. Soft IRQ handlers (pin handlers and
+timer callbacks) are serialized by ``hardware.irq_lock``, like the MicroPython scheduler runs them
+one at a time, and ``disable_irq()`` takes the same lock.
+"""
+import errno
+import threading
+import time
+
+import simulator
+
+
+def _hardware():
+    return simulator.hardware
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    ALT = 3
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, *, value=None, **kwargs):
+        self.id = id
+        self._state = _hardware().pin(id)
+        if value is not None:
+            self.value(value)
+
+    def init(self, mode=-1, pull=-1, *, value=None, **kwargs):
+        if value is not None:
+            self.value(value)
+
+    def value(self, x=None):
+        if x is None:
+            return self._state.value
+        self._state.set(x, Pin.IRQ_RISING, Pin.IRQ_FALLING)
+
+    __call__ = value
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    high = on
+    low = off
+
+    def toggle(self):
+        self.value(not self._state.value)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        if handler is None:
+            self._state.handler = None
+        else:
+            lock = _hardware().irq_lock
+
+            def call(state):
+                with lock:
+                    handler(self)
+
+            self._state.handler = call
+        self._state.trigger = trigger
+
+    def __repr__(self):
+        return f"Pin({self.id})"
+
+
+class ADC:
+    CORE_TEMP = 4
+
+    def __init__(self, channel):
+        if isinstance(channel, Pin):
+            channel = channel.id - 26
+        self.channel = channel
+
+    def read_u16(self):
+        return _hardware().read_adc(self.channel)
+
+
+class PWM:
+    def __init__(self, dest, *, freq=None, duty_u16=None, **kwargs):
+        self._state = _hardware().pin(dest.id, 0)
+        self._freq = 0
+        if freq is not None:
+            self.freq(freq)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+
+    def freq(self, value=None):
+        if value is None:
+            return self._freq
+        self._freq = value
+
+    def duty_u16(self, value=None):
+        if value is None:
+            return self._state.duty
+        self._state.duty = min(max(int(value), 0), 65535)
+
+    def duty_ns(self, value=None):
+        period_ns = 1_000_000_000 // self._freq if self._freq else 0
+        if value is None:
+            return self._state.duty * period_ns // 65535 if period_ns else 0
+        self.duty_u16(value * 65535 // period_ns if period_ns else 0)
+
+    def deinit(self):
+        self._state.duty = 0
+
+
+class I2C:
+    """An I2C bus. The transactions are sent to the emulated devices attached to the bus with
+    ``hardware.attach()`` and counted in ``hardware.i2c_stats[id]``."""
+
+    def __init__(self, id, *, scl=None, sda=None, freq=400_000, timeout=50_000):
+        self.id = id
+        self._freq = freq
+        self._devices = _hardware().i2c_devices(id)
+        self._stats = _hardware().i2c_stats(id)
+        self._stats["freq"] = freq
+
+    def _device(self, addr):
+        device = self._devices.get(addr)
+        if device is None:
+            raise OSError(errno.EIO, "no device at address")
+        return device
+
+    def _transaction(self, addr, direction, data):
+        self._stats["transactions"] += 1
+        self._stats["bytes"] += len(data)
+        log = _hardware().i2c_log
+        if log is not None:
+            log.append((self.id, addr, direction, bytes(data)))
+
+    def scan(self):
+        return sorted(self._devices)
+
+    def writeto(self, addr, buf, stop=True):
+        device = self._device(addr)
+        data = bytes(buf)
+        self._transaction(addr, "w", data)
+        device.write(data)
+        return len(data) + 1
+
+    def writevto(self, addr, vector, stop=True):
+        device = self._device(addr)
+        data = b"".join(bytes(buf) for buf in vector)
+        self._transaction(addr, "w", data)
+        device.write(data)
+        return len(data) + 1
+
+    def readfrom_into(self, addr, buf, stop=True):
+        device = self._device(addr)
+        data = device.read(len(buf))
+        self._transaction(addr, "r", data)
+        buf[:] = data
+
+    def readfrom(self, addr, nbytes, stop=True):
+        buf = bytearray(nbytes)
+        self.readfrom_into(addr, buf, stop)
+        return bytes(buf)
+
+
+class Timer:
+    """A timer calling its callback from a background thread, or from ``hardware.run_timers()``
+    when the simulator is installed with ``threaded_timers=False``."""
+
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self._active = False
+        self._generation = 0
+        if kwargs.get("callback") is not None:
+            self.init(**kwargs)
+
+    def init(self, *, mode=PERIODIC, freq=-1, period=-1, tick_hz=1000, callback=None, hard=False):
+        self.deinit()
+        self._interval = 1 / freq if freq > 0 else period / tick_hz
+        self._mode = mode
+        self._callback = callback
+        self._due = time.monotonic() + self._interval
+        self._active = True
+        hardware = _hardware()
+        hardware.timers.append(self)
+        if hardware.threaded_timers:
+            thread = threading.Thread(target=self._run, args=(self._generation,), daemon=True)
+            thread.start()
+
+    def deinit(self):
+        self._generation += 1
+        if self._active:
+            self._active = False
+            timers = _hardware().timers
+            if self in timers:
+                timers.remove(self)
+
+    def _run(self, generation):
+        while self._generation == generation:
+            delay = self._due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._run_due(generation)
+
+    def _run_due(self, generation=None):
+        with _hardware().irq_lock:
+            if not self._active or (generation is not None and generation != self._generation):
+                return
+            now = time.monotonic()
+            if now < self._due:
+                return
+            if self._mode == Timer.ONE_SHOT:
+                self.deinit()
+            else:
+                self._due += self._interval
+                if self._due < now:
+                    self._due = now + self._interval
+            if self._callback is not None:
+                self._callback(self)
+
+
+def freq(hz=None):
+    if hz is None:
+        return _hardware().cpu_freq
+    _hardware().cpu_freq = hz
+
+
+def disable_irq():
+    _hardware().irq_lock.acquire()
+    return True
+
+
+def enable_irq(state=True):
+    _hardware().irq_lock.release()
+
+
+def reset():
+    raise simulator.Reset()
+
+
+soft_reset = reset
+
+
+def unique_id():
+    return b"europi\x00\x00"
+
+
+def idle():
+    time.sleep(0.0001)
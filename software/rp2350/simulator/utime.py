@@ -0,0 +1,40 @@
+"""A fake ``utime`` module: the CPython ``time`` functions plus the MicroPython ticks functions,
+which wrap around like on the device."""
+import time as _time
+from time import gmtime, localtime, mktime, time, time_ns  # noqa: F401
+
+TICKS_PERIOD = 1 << 30
+_TICKS_MAX = TICKS_PERIOD - 1
+_TICKS_HALFPERIOD = TICKS_PERIOD // 2
+
+
+def ticks_ms():
+    return (_time.monotonic_ns() // 1_000_000) & _TICKS_MAX
+
+
+def ticks_us():
+    return (_time.monotonic_ns() // 1_000) & _TICKS_MAX
+
+
+def ticks_cpu():
+    return ticks_us()
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & _TICKS_MAX
+
+
+def ticks_diff(ticks1, ticks2):
+    return ((ticks1 - ticks2 + _TICKS_HALFPERIOD) & _TICKS_MAX) - _TICKS_HALFPERIOD
+
+
+def sleep(seconds):
+    _time.sleep(seconds)
+
+
+def sleep_ms(ms):
+    _time.sleep(ms / 1000)
+
+
+def sleep_us(us):
+    _time.sleep(us / 1_000_000)
@@ -1,9 +1,5 @@
 
-try:
-    from lib.input_calibration_values import INPUT_CALIBRATION_VALUES
-except ImportError:
-    print("using default calibrations values from INPUT_CALIBRATION_VALUES")
-    from default_calibration import INPUT_CALIBRATION_VALUES
+from calibration_store import INPUT_CALIBRATION_VALUES
 
 
 def clamp(v, low, high):
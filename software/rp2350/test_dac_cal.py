@@ -1,9 +1,5 @@
 
-try:
-    from lib.dac_calibration_values import OUTPUT_DAC_CALIBRATION_VALUES
-except ImportError:
-    print("using default calibrations values from OUTPUT_DAC_CALIBRATION_VALUES")
-    from default_calibration import OUTPUT_DAC_CALIBRATION_VALUES
+from calibration_store import OUTPUT_DAC_CALIBRATION_STEPS, OUTPUT_DAC_CALIBRATION_VALUES
 
 
 def clamp(v, low, high):
@@ -31,8 +27,9 @@ while True:
     voltage = float(input('? '))
 
     voltage = clamp(voltage, MIN_VOLTAGE, MAX_VOLTAGE)
-    index = int(voltage // 1)
-    v = round(OUTPUT_DAC_CALIBRATION_VALUES[channel][index] + (_gradients[index] * (voltage % 1)))
+    position = voltage * 1000 / OUTPUT_DAC_CALIBRATION_STEPS[channel]
+    index = min(int(position // 1), len(_gradients) - 1)
+    v = round(OUTPUT_DAC_CALIBRATION_VALUES[channel][index] + (_gradients[index] * (position - index)))
     if v > 4095:
         v = 4095
 
@@ -0,0 +1,42 @@
+"""Tests of the firmware run on a computer, in the simulator. From the firmware's directory::
+
+    python -m pytest tests/host
+
+The simulator is installed once, with the timers called only by ``hardware.run_timers()``. Each test
+runs in an empty temporary directory, so that the files written by the firmware (saved states,
+configurations...) do not leak between the tests.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import simulator  # noqa: E402
+
+_hardware = simulator.install(threaded_timers=False)
+
+
+@pytest.fixture(autouse=True)
+def _isolated(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    yield
+    _hardware.i2c_log = None
+    europi = sys.modules.get("europi")
+    if europi is not None:
+        europi.reset_state()
+
+
+@pytest.fixture
+def hardware():
+    """The simulated module, with cleared statistics."""
+    _hardware.reset_stats()
+    return _hardware
+
+
+@pytest.fixture
+def i2c_log(hardware):
+    """The list of the I2C transactions ``(bus, address, direction, bytes)`` made during the test."""
+    hardware.i2c_log = []
+    return hardware.i2c_log
@@ -0,0 +1,52 @@
+"""The display only sends the pages and columns that changed since the frame on screen."""
+import pytest
+
+
+@pytest.fixture
+def oled(hardware):
+    from europi import oled
+
+    oled.fill(0)
+    oled.refresh()
+    hardware.reset_stats()
+    return oled
+
+
+def test_sends_only_the_drawn_area(hardware, oled):
+    oled.fill_rect(10, 0, 4, 4, 1)
+    oled.show()
+    # columns 10 to 13 of page 0
+    assert hardware.oled.data_bytes == 4
+    assert hardware.oled.frame() == bytes(oled.buffer)
+
+
+def test_sends_the_pages_spanned_by_the_area(hardware, oled):
+    oled.vline(100, 6, 4, 1)
+    oled.show()
+    # rows 6 to 9 are in pages 0 and 1
+    assert hardware.oled.data_bytes == 2
+    assert hardware.oled.frame() == bytes(oled.buffer)
+
+
+def test_sends_nothing_without_change(hardware, oled):
+    oled.fill_rect(10, 0, 4, 4, 1)
+    oled.show()
+    hardware.reset_stats()
+    oled.show()
+    oled.fill_rect(10, 0, 4, 4, 1)  # drawn again, but the frame is the same
+    oled.show()
+    assert hardware.oled.data_bytes == 0
+
+
+def test_fill_and_redraw_sends_only_the_difference(hardware, oled):
+    oled.fill_rect(10, 0, 4, 4, 1)
+    oled.fill_rect(50, 16, 8, 8, 1)
+    oled.show()
+    hardware.reset_stats()
+    oled.fill(0)
+    oled.fill_rect(10, 0, 4, 4, 1)
+    oled.fill_rect(50, 16, 2, 8, 1)
+    oled.show()
+    # only columns 52 to 57 of page 2 were cleared
+    assert hardware.oled.data_bytes == 6
+    assert hardware.oled.frame() == bytes(oled.buffer)
@@ -0,0 +1,90 @@
+"""The tasks of an ``AsyncEuroPiScript`` scheduled by ``every()`` and ``on_edge()``."""
+import asyncio
+
+
+def run(tasks):
+    """Run the tasks in an ``AsyncEuroPiScript`` until it is stopped."""
+    from europi_async import AsyncEuroPiScript
+
+    class Script(AsyncEuroPiScript):
+        def tasks(self):
+            return tasks(self)
+
+    script = Script()
+    script.main()
+    return script
+
+
+def test_every_calls_at_the_period():
+    from europi_async import every
+
+    calls = []
+
+    async def stop(script):
+        await asyncio.sleep(0.105)
+        script.stop()
+
+    run(lambda script: [every(20, lambda: calls.append(1)), stop(script)])
+    # at 0, 20, 40, 60, 80 and 100 ms
+    assert 5 <= len(calls) <= 6
+
+
+def test_every_awaits_coroutine_functions():
+    from europi_async import every
+
+    calls = []
+
+    async def slow():
+        calls.append("start")
+        await asyncio.sleep(0.03)
+        calls.append("end")
+
+    async def stop(script):
+        await asyncio.sleep(0.05)
+        script.stop()
+
+    run(lambda script: [every(10, slow), stop(script)])
+    # the period is 10 ms, but a call starts when the previous one has ended
+    assert calls == ["start", "end", "start"]
+
+
+def test_on_edge_calls_after_each_edge(hardware):
+    from europi import din
+    from europi_async import on_edge
+
+    calls = []
+
+    async def pulses(script):
+        for _ in range(3):
+            await asyncio.sleep(0.005)
+            hardware.press("din")
+            await asyncio.sleep(0.005)
+            hardware.release("din")
+        await asyncio.sleep(0.005)
+        script.stop()
+
+    run(lambda script: [on_edge(din, lambda: calls.append(1)), pulses(script)])
+    assert len(calls) == 3
+
+
+def test_on_edge_merges_the_edges_during_a_call(hardware):
+    from europi import din
+    from europi_async import on_edge
+
+    calls = []
+
+    async def clock():
+        calls.append(1)
+        await asyncio.sleep(0.03)
+
+    async def pulses(script):
+        for _ in range(3):
+            await asyncio.sleep(0.005)
+            hardware.press("din")
+            hardware.release("din")
+        await asyncio.sleep(0.05)
+        script.stop()
+
+    run(lambda script: [on_edge(din, clock), pulses(script)])
+    # the first edge starts a call, the next two are merged into a second call
+    assert len(calls) == 2
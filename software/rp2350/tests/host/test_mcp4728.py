@@ -0,0 +1,83 @@
+"""The MCP4728 driver updates the four channels in a single Fast Write or Multi-Write transaction."""
+import pytest
+
+from simulator.devices import MCP4728Device
+
+BUS = 5  # a bus of its own, so that the driver of europi is not affected
+ADDRESS = 0x60
+
+
+@pytest.fixture
+def device(hardware):
+    device = MCP4728Device(hardware.pin(99, 0))
+    hardware.attach(BUS, ADDRESS, device)
+    yield device
+    hardware.i2c_devices(BUS).clear()
+
+
+def make_driver(cached=False, read_registers=True):
+    from machine import I2C
+
+    from mcp4728 import MCP4728
+
+    return MCP4728(I2C(BUS), ADDRESS, cached=cached, read_registers=read_registers)
+
+
+def writes(i2c_log):
+    return [data for bus, address, direction, data in i2c_log if bus == BUS and direction == "w"]
+
+
+def test_fast_write_sends_8_bytes(device, i2c_log):
+    dac = make_driver(read_registers=False)
+    dac.set_values([0x123, 0x456, 0x789, 0xABC])
+    # 0 0 PD1 PD0 D11 D10 D9 D8, D7..D0 for each channel
+    assert writes(i2c_log) == [bytes([0x01, 0x23, 0x04, 0x56, 0x07, 0x89, 0x0A, 0xBC])]
+    assert [channel["value"] for channel in device.channels] == [0x123, 0x456, 0x789, 0xABC]
+    assert device.commands == {"fast_write": 1}
+
+
+def test_multi_write_sends_12_bytes(device, i2c_log):
+    dac = make_driver(read_registers=False)
+    dac.set_values([1, 2, 3, 4])
+    dac.c._vref = 1
+    dac.c._gain = 2
+    i2c_log.clear()
+    dac.sync_all()
+    # 0 1 0 0 0 DAC1 DAC0 UDAC, then VREF PD1 PD0 Gx D11..D8, D7..D0 for each channel
+    assert writes(i2c_log) == [
+        bytes([0x40, 0x00, 0x01, 0x42, 0x00, 0x02, 0x44, 0x90, 0x03, 0x46, 0x00, 0x04])
+    ]
+    assert device.channels[2]["vref"] == 1
+    assert device.channels[2]["gain"] == 2
+    assert [channel["output"] for channel in device.channels] == [1, 2, 3, 4]
+
+
+def test_cached_values_are_not_sent_again(device, i2c_log):
+    dac = make_driver(cached=True, read_registers=False)
+    dac.sync_all()
+    i2c_log.clear()
+    dac.set_values([1, 2, 3, 4])
+    dac.set_values([1, 2, 3, 4])
+    dac.set_values([1, None, 3, 5])
+    assert len(writes(i2c_log)) == 2
+    assert [(channel.writes, channel.suppressed_writes) for channel in dac._channels] == [
+        (1, 2),
+        (1, 1),
+        (1, 2),
+        (2, 1),
+    ]
+
+
+def test_none_keeps_the_device_value_when_not_cached(device):
+    dac = make_driver()
+    other = make_driver()
+    other.set_values([100, 200, 300, 400])
+    dac.set_values([None, 5, None, None])
+    assert [channel["value"] for channel in device.channels] == [100, 5, 300, 400]
+
+
+def test_values_out_of_range_are_rejected(device, i2c_log):
+    dac = make_driver(read_registers=False)
+    with pytest.raises(AttributeError):
+        dac.set_values([0, 4096, 0, 0])
+    assert writes(i2c_log) == []
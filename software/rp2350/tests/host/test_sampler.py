@@ -0,0 +1,100 @@
+"""The background sampler, the filters and the hysteresis of the analogue readers."""
+import pytest
+
+
+class FakeTimer:
+    def __init__(self):
+        self.running = False
+
+    def init(self, **kwargs):
+        self.running = True
+        self.kwargs = kwargs
+
+    def deinit(self):
+        self.running = False
+
+
+def position(k):
+    return k.percent(deadzone=0.0)
+
+
+def test_sampler_returns_the_average_of_the_buffer(hardware):
+    from europi import AnalogueSampler, k1
+
+    timer = FakeTimer()
+    sampler = AnalogueSampler([k1], size=4, timer=timer)
+    hardware.set_input("k1", 0.2)
+    sampler.start()
+    assert timer.running
+    assert timer.kwargs["callback"] == sampler.sample
+    assert position(k1) == pytest.approx(0.2, abs=0.001)
+
+    hardware.set_input("k1", 0.6)
+    sampler.sample()
+    sampler.sample()
+    assert position(k1) == pytest.approx(0.4, abs=0.001)
+
+    # the readers do not read the ADC while the sampler runs
+    hardware.set_input("k1", 1.0)
+    assert position(k1) == pytest.approx(0.4, abs=0.001)
+
+
+def test_reset_state_stops_the_sampler(hardware):
+    import europi
+    from europi import AnalogueSampler, k1
+
+    timer = FakeTimer()
+    AnalogueSampler([k1], size=4, timer=timer).start()
+    europi.reset_state()
+    assert not timer.running
+    hardware.set_input("k1", 0.7)
+    assert position(k1) == pytest.approx(0.7, abs=0.001)
+
+
+def test_median_filter_removes_a_spike(hardware):
+    from europi import Median, k1
+
+    k1.set_filters(Median(3))
+    hardware.set_input("k1", 0.5)
+    position(k1)
+    position(k1)
+    hardware.set_input("k1", 0.0)
+    assert position(k1) == pytest.approx(0.5, abs=0.001)
+
+
+def test_moving_average_filter(hardware):
+    from europi import MovingAverage, k1
+
+    k1.set_filters(MovingAverage(4))
+    hardware.set_input("k1", 0.2)
+    assert position(k1) == pytest.approx(0.2, abs=0.001)
+    hardware.set_input("k1", 0.6)
+    position(k1)
+    assert position(k1) == pytest.approx(0.4, abs=0.001)
+
+
+def test_hysteresis_keeps_the_step(hardware):
+    from europi import k1
+
+    k1.set_hysteresis(0.25)
+    hardware.set_input("k1", 0.52)
+    assert k1.range(10, deadzone=0.0) == 5
+    hardware.set_input("k1", 0.49)
+    assert k1.range(10, deadzone=0.0) == 5
+    hardware.set_input("k1", 0.47)
+    assert k1.range(10, deadzone=0.0) == 4
+
+
+def test_reset_state_removes_the_filters_and_hysteresis(hardware):
+    import europi
+    from europi import Median, k1
+
+    k1.set_filters(Median(3))
+    k1.set_hysteresis(0.25)
+    hardware.set_input("k1", 0.52)
+    k1.range(10, deadzone=0.0)
+    europi.reset_state()
+    hardware.set_input("k1", 0.49)
+    assert k1.range(10, deadzone=0.0) == 4
+    hardware.set_input("k1", 0.0)
+    assert position(k1) == pytest.approx(0.0, abs=0.001)
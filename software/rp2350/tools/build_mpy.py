@@ -0,0 +1,148 @@
+"""
+Cross-compile the firmware and the scripts to .mpy files, so that the module does not compile the
+sources at every import.
+
+Run it from the rp2350 directory, with mpy-cross installed (``pip install mpy-cross``, in the version
+matching the MicroPython firmware)::
+
+    python tools/build_mpy.py [--out build/mpy] [--measure PORT]
+
+The .mpy files are written in the output directory, with the same layout as the sources, and the
+size of each module is reported. The bytecode never contains the docstrings, so the large
+docstrings of europi.py or europi_script.py cost nothing on the module once compiled.
+
+main.py, boot.py, the calibration values and the scripts run from the REPL (tests, benchmark) are
+left as sources.
+
+With ``--measure PORT``, the import time and heap use of the modules are measured on the module
+connected to PORT with mpremote, first with the sources found on the module, then after copying the
+.mpy files and removing the sources (the module then keeps running the .mpy files).
+
+To freeze the core modules into the firmware instead, see manifest.py.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# files and directories which are not compiled; the calibration values are rewritten by the
+# calibration scripts as sources
+EXCLUDED_FILES = {
+    "main.py",
+    "boot.py",
+    "benchmark.py",
+    "manifest.py",
+    "calibration_values.py",
+    "dac_calibration_values.py",
+    "input_calibration_values.py",
+}
+EXCLUDED_DIRS = {"build", "simulator", "tests", "tools", "__pycache__"}
+
+# modules whose import time is measured with --measure
+MEASURED_MODULES = ["europi", "europi_script", "configuration", "bootloader"]
+
+IMPORT_TIMER = (
+    "import gc, time\n"
+    "gc.collect()\n"
+    "free = gc.mem_free()\n"
+    "start = time.ticks_us()\n"
+    "import {module}\n"
+    "print('import_time', time.ticks_diff(time.ticks_us(), start), free - gc.mem_free())\n"
+)
+
+
+def find_sources(root=ROOT):
+    """Return the paths of the sources to compile, relative to ``root``."""
+    sources = []
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d not in EXCLUDED_DIRS and not d.startswith("."))
+        for name in sorted(files):
+            if name.endswith(".py") and name not in EXCLUDED_FILES and not name.startswith("test_"):
+                sources.append(os.path.relpath(os.path.join(directory, name), root))
+    return sources
+
+
+def find_mpy_cross(path=None):
+    path = path or shutil.which("mpy-cross")
+    if not path:
+        sys.exit("mpy-cross not found: install it with 'pip install mpy-cross' or use --mpy-cross")
+    return path
+
+
+def build(sources, out, mpy_cross, root=ROOT):
+    """Compile the sources to ``out`` and return a list of (source, .mpy, source size, .mpy size)."""
+    results = []
+    for source in sources:
+        target = os.path.join(out, source[:-3] + ".mpy")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # -s sets the file name used in the tracebacks
+        subprocess.run([mpy_cross, "-s", source, "-o", target, os.path.join(root, source)], check=True)
+        results.append((source, target, os.path.getsize(os.path.join(root, source)), os.path.getsize(target)))
+    return results
+
+
+def print_sizes(results):
+    print(f"{'module':40} {'source':>8} {'mpy':>8}")
+    for source, _, source_size, mpy_size in results:
+        print(f"{source:40} {source_size:>8} {mpy_size:>8}  {mpy_size / source_size:>5.0%}")
+    source_total = sum(r[2] for r in results)
+    mpy_total = sum(r[3] for r in results)
+    print(f"{'total':40} {source_total:>8} {mpy_total:>8}  {mpy_total / source_total:>5.0%}")
+
+
+def _mpremote(port, *args):
+    result = subprocess.run(["mpremote", "connect", port, *args], check=True, capture_output=True, text=True)
+    return result.stdout
+
+
+def measure_imports(port, modules=MEASURED_MODULES):
+    """Return {module: (import time in us, heap used in bytes)}, each measured after a soft reset."""
+    times = {}
+    for module in modules:
+        output = _mpremote(port, "soft-reset", "exec", IMPORT_TIMER.format(module=module))
+        for line in output.splitlines():
+            if line.startswith("import_time"):
+                _, us, heap = line.split()
+                times[module] = (int(us), int(heap))
+    return times
+
+
+def deploy(port, results):
+    """Copy the .mpy files to the module and remove the sources they replace."""
+    for source, target, _, _ in results:
+        remote = source[:-3].replace(os.sep, "/")
+        _mpremote(port, "cp", target, f":{remote}.mpy")
+        try:
+            _mpremote(port, "rm", f":{remote}.py")
+        except subprocess.CalledProcessError:
+            pass  # not on the module
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-compile the firmware to .mpy files.")
+    parser.add_argument("--out", default=os.path.join(ROOT, "build", "mpy"), help="output directory")
+    parser.add_argument("--mpy-cross", help="path of the mpy-cross executable")
+    parser.add_argument("--measure", metavar="PORT", help="measure the import times on this module, then deploy")
+    args = parser.parse_args()
+
+    results = build(find_sources(), args.out, find_mpy_cross(args.mpy_cross))
+    print_sizes(results)
+
+    if args.measure:
+        before = measure_imports(args.measure)
+        deploy(args.measure, results)
+        after = measure_imports(args.measure)
+        print(f"\n{'import':20} {'source us':>10} {'mpy us':>10} {'source heap':>12} {'mpy heap':>10}")
+        for module in MEASURED_MODULES:
+            if module in before and module in after:
+                print(
+                    f"{module:20} {before[module][0]:>10} {after[module][0]:>10} "
+                    f"{before[module][1]:>12} {after[module][1]:>10}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Models of the calibration of an output
+
+An output is calibrated by a table of its values every ``step_mv`` millivolts from 0 V, which
+``Output`` interpolates linearly (or precomputes for every millivolt with ``build_table()``), so a
+finer table costs no time when the output is set. The table is built either:
+
+  * by measuring the value of each point of the table (``DacCalibration.calibrate()``), a
+    piecewise linear model, or
+  * from a least-squares polynomial fitted on a sweep of the output (``fit_polynomial()`` and
+    ``polynomial_table()``), which averages the noise of the measurements.
+
+``errors()`` compares a table with the voltages measured by a sweep, and returns the maximum and
+the RMS error in millivolts.
+"""
+from utils.calibrator import segment_index
+
+DEFAULT_DEGREE = 3
+
+
+def sweep(measure, codes, to_millivolts):
+    """Measure the output at each of the ``codes``, and return the codes and the voltages in
+    millivolts, without the voltages out of the range of the input.
+
+    :param measure: a function setting the output to a code and returning the settled reading
+    :param codes: the increasing codes to measure
+    :param to_millivolts: a function returning the voltage in millivolts of a reading, None if out
+        of range
+    """
+    measured_codes = []
+    millivolts = []
+    for code in codes:
+        voltage = to_millivolts(measure(code))
+        if voltage is not None:
+            measured_codes.append(code)
+            millivolts.append(voltage)
+    return measured_codes, millivolts
+
+
+class Polynomial:
+    """A polynomial of ``x``, computed in the variable ``(x - center) / scale`` which keeps the
+    powers close to 1 in single precision floats.
+
+    :param coefficients: the coefficients, of the lowest degree first
+    """
+
+    def __init__(self, coefficients, center, scale):
+        self.coefficients = coefficients
+        self.center = center
+        self.scale = scale
+
+    def __call__(self, x):
+        u = (x - self.center) / self.scale
+        result = 0
+        for coefficient in reversed(self.coefficients):
+            result = result * u + coefficient
+        return result
+
+
+def fit_polynomial(xs, ys, degree=DEFAULT_DEGREE):
+    """Return the ``Polynomial`` of ``degree`` fitting the points with the least squares error.
+
+    The least squares problem is solved with a QR decomposition (modified Gram-Schmidt), which
+    is better conditioned than the normal equations in single precision.
+    """
+    if len(xs) <= degree:
+        raise ValueError(f"fitting a polynomial of degree {degree} needs more than {degree} points")
+    low = min(xs)
+    high = max(xs)
+    center = (low + high) / 2
+    scale = (high - low) / 2 or 1
+    us = [(x - center) / scale for x in xs]
+    columns = [[u**power for u in us] for power in range(degree + 1)]
+    # columns = Q R, with the orthonormal columns of Q replacing the columns
+    r = [[0.0] * (degree + 1) for _ in range(degree + 1)]
+    for j in range(degree + 1):
+        column = columns[j]
+        for i in range(j):
+            q = columns[i]
+            r[i][j] = sum(a * b for a, b in zip(q, column))
+            column = [a - r[i][j] * b for a, b in zip(column, q)]
+        r[j][j] = sum(a * a for a in column) ** 0.5
+        columns[j] = [a / r[j][j] for a in column]
+    # R coefficients = Q^T ys, solved by back substitution
+    qty = [sum(a * b for a, b in zip(q, ys)) for q in columns]
+    coefficients = [0.0] * (degree + 1)
+    for i in range(degree, -1, -1):
+        coefficients[i] = (qty[i] - sum(r[i][j] * coefficients[j] for j in range(i + 1, degree + 1))) / r[i][i]
+    return Polynomial(coefficients, center, scale)
+
+
+def polynomial_table(polynomial, step_mv, max_mv, max_code):
+    """Return the table of the codes every ``step_mv`` millivolts from 0 to ``max_mv``, computed by
+    a polynomial of the voltage in millivolts."""
+    return [
+        min(max(round(polynomial(millivolts)), 0), max_code)
+        for millivolts in range(0, max_mv + 1, step_mv)
+    ]
+
+
+def table_millivolts(table, step_mv, code):
+    """Return the voltage in millivolts of a code, interpolated in a table of codes every
+    ``step_mv`` millivolts."""
+    index = min(max(segment_index(table, code), 0), len(table) - 2)
+    codes = table[index + 1] - table[index]
+    if not codes:
+        return index * step_mv
+    return (index + (code - table[index]) / codes) * step_mv
+
+
+def errors(table, step_mv, codes, millivolts):
+    """Return the maximum and the RMS difference in millivolts between the voltages of the
+    ``codes`` given by the table, and the measured ``millivolts``. Only the codes within the range
+    of the table are compared."""
+    differences = [
+        table_millivolts(table, step_mv, code) - voltage
+        for code, voltage in zip(codes, millivolts)
+        if table[0] <= code <= table[-1]
+    ]
+    if not differences:
+        return 0.0, 0.0
+    return (
+        max(abs(difference) for difference in differences),
+        (sum(difference * difference for difference in differences) / len(differences)) ** 0.5,
+    )
@@ -5,17 +5,30 @@ date: 2024-09-15
 labels: calibration
 
 """
-from machine import Pin, ADC, PWM, I2C, reset
+from machine import Pin, ADC, PWM, I2C
 
 from utils.simple_state_machine import SimpleStateMachine
-from europi import oled, b1, b2, k1, k2, dac, DEFAULT_SAMPLES, ain
+from europi import oled, b1, b2, k1, k2, dac, DEFAULT_SAMPLES, ain, reset_module
 from europi_script import EuroPiScript
 
-try:
-    from input_calibration_values import INPUT_CALIBRATION_VALUES
-except ImportError:
-    # print("using default calibrations values from INPUT_CALIBRATION_VALUES")
-    from default_calibration import INPUT_CALIBRATION_VALUES
+from calibration_store import INPUT_CALIBRATION_VALUES
+
+
+def segment_index(values, x):
+    """Return the index of the calibration segment containing ``x`` in the sorted ``values``.
+
+    This is the index of the last value lower than ``x``: -1 if ``x`` is not above the first value,
+    and the index of the last value if ``x`` is above all the values.
+    """
+    low = 0
+    high = len(values)
+    while low < high:
+        middle = (low + high) // 2
+        if values[middle] < x:
+            low = middle + 1
+        else:
+            high = middle
+    return low - 1
 
 
 class Calibrator(EuroPiScript):
@@ -36,6 +49,9 @@ class Calibrator(EuroPiScript):
         self.m = SimpleStateMachine()
         b1.handler(self.button1)
         b2.handler(self.button2)
+        # the knobs are compared to their previous position to detect a motion, so avoid flickering
+        k1.set_hysteresis(0.25)
+        k2.set_hysteresis(0.25)
 
     def set_in_values(self, values):
         self.in_values = values
@@ -87,10 +103,7 @@ class Calibrator(EuroPiScript):
         self.m.do_action("K2")
 
     def reading_to_voltage(self, reading):
-        try:
-            index = next(index for index, v in enumerate(self.in_values) if v >= reading) - 1
-        except StopIteration:
-            index = len(self.in_values) - 1
+        index = segment_index(self.in_values, reading)
         if index < 0:
             cv = 0
         else:
@@ -98,10 +111,7 @@ class Calibrator(EuroPiScript):
         return max(min(cv, 12), 0)
 
     def cv_to_reading(self, cv):
-        try:
-            index = next(index for index, v in enumerate(self.points) if v >= cv) - 1
-        except StopIteration:
-            index = len(self.points) - 1
+        index = segment_index(self.points, cv)
         if index < 0:
             return self.readings[0]
         else:
@@ -156,4 +166,4 @@ class Calibrator(EuroPiScript):
     def do_reset(self, action):
         oled.fill(0)
         oled.show()
-        reset()
+        reset_module()
@@ -0,0 +1,127 @@
+"""
+Search of the DAC codes giving target readings of the analogue input
+
+The output of a DAC channel is patched to the analogue input, and ``DacCalibration.find_code()``
+searches the 12-bit code whose reading is the closest to a target reading. The search starts from
+a code extrapolated with the slope of the previous calibration point, then narrows the bracket of
+the target with the secant method, falling back to bisection when the secant does not halve the
+bracket. A calibration point usually takes 3 to 5 readings instead of the dozens of steps of a
+linear search.
+
+Instead of sleeping a fixed time after setting a code, the input is read until two consecutive
+readings differ by less than the noise of the input, measured when the calibration starts.
+"""
+
+DAC_MAX_CODE = 4095
+# DAC codes per volt at the output (3.3 V DAC reference, output stage gain of 3.2), used to seed the
+# search of the first calibration point only
+NOMINAL_CODES_PER_VOLT = 4096 / (3.3 * 3.2)
+
+NOISE_READINGS = 8  # readings used to measure the noise of the input
+MAX_SETTLE_READINGS = 16  # maximum number of readings waiting for the output to settle
+MAX_SEARCH_STEPS = 16  # a bisection of the 12-bit codes takes 12 steps
+
+
+class DacCalibration:
+    """Searches the codes of a DAC channel giving target readings.
+
+    :param write: a function setting the code of the DAC channel
+    :param read: a function returning a reading of the analogue input (usually over-sampled)
+    :param max_code: the highest code of the DAC
+    """
+
+    def __init__(self, write, read, max_code=DAC_MAX_CODE):
+        self.write = write
+        self.read = read
+        self.max_code = max_code
+        self.settle_tolerance = 1
+        self.readings = 0  # number of readings made, to report the cost of the calibration
+
+    def measure_noise(self, code=0):
+        """Set ``code`` and set the settling tolerance to three standard deviations of the readings
+        of the input. Return the mean reading."""
+        self.write(code)
+        self.read()  # the first reading may not be settled
+        readings = [self.read() for _ in range(NOISE_READINGS)]
+        self.readings += NOISE_READINGS + 1
+        mean = sum(readings) / NOISE_READINGS
+        variance = sum((reading - mean) ** 2 for reading in readings) / (NOISE_READINGS - 1)
+        self.settle_tolerance = max(1, 3 * variance**0.5)
+        return mean
+
+    def measure(self, code):
+        """Set ``code`` and return the reading of the input once settled."""
+        self.write(code)
+        previous = self.read()
+        self.readings += 1
+        for _ in range(MAX_SETTLE_READINGS):
+            reading = self.read()
+            self.readings += 1
+            if abs(reading - previous) <= self.settle_tolerance:
+                return (reading + previous) / 2
+            previous = reading
+        return reading
+
+    def find_code(self, target, code, reading, slope):
+        """Return the code giving the reading the closest to ``target``, and this reading.
+
+        :param target: the reading to reach
+        :param code: a code whose reading is below ``target``, usually the previous calibration point
+        :param reading: the reading of ``code``
+        :param slope: the expected number of codes per unit of reading
+        """
+        low, low_reading = code, reading
+        high = high_reading = None
+        guess = low + slope * (target - low_reading)
+        width = self.max_code - low
+        for _ in range(MAX_SEARCH_STEPS):
+            guess = min(max(round(guess), low + 1), self.max_code if high is None else high - 1)
+            guess_reading = self.measure(guess)
+            if guess_reading < target:
+                low, low_reading = guess, guess_reading
+            else:
+                high, high_reading = guess, guess_reading
+            if high is None:
+                if low == self.max_code:
+                    return low, low_reading  # the target is out of the range of the DAC
+                # extrapolate from the closest point below the target
+                guess = low + slope * (target - low_reading)
+                continue
+            if high - low <= 1:
+                break
+            if (high - low) * 2 > width:
+                # the secant did not halve the bracket
+                guess = (low + high) / 2
+            else:
+                guess = low + (high - low) * (target - low_reading) / (high_reading - low_reading)
+            width = high - low
+        if high is None or target - low_reading < high_reading - target:
+            return low, low_reading
+        return high, high_reading
+
+    def calibrate(self, targets, progress=None, step_mv=1000):
+        """Return the codes giving the readings ``targets``.
+
+        :param targets: the increasing readings of the calibration points at 0, ``step_mv``,
+            2 * ``step_mv``... millivolts
+        :param progress: an optional function called with the index, the code and the reading of
+            each point found
+        :param step_mv: the millivolts between the calibration points
+        """
+        reading = self.measure_noise(0)
+        code = 0
+        codes = [0]
+        slope = None
+        for index in range(1, len(targets)):
+            target = targets[index]
+            if slope is None:
+                # nominal slope, in codes per unit of reading
+                slope = NOMINAL_CODES_PER_VOLT * step_mv / 1000 / (targets[1] - targets[0])
+            new_code, new_reading = self.find_code(target, code, reading, slope)
+            if new_reading > reading:
+                slope = (new_code - code) / (new_reading - reading)
+            code, reading = new_code, new_reading
+            codes.append(code)
+            if progress:
+                progress(index, code, reading)
+        return codes